@@ -10,11 +10,46 @@ class CrosswordCreator():
         Create new CSP crossword generate.
         """
         self.crossword = crossword
+
+        # Number every word in a table ordered by length, so the words of each
+        # length form one run, and index the words with each letter at each
+        # position as a bitset of their numbers
+        self.table = sorted(self.crossword.words, key=lambda word: (len(word), word))
+        self.lengths = dict()
+        self.index = dict()
+        for n, word in enumerate(self.table):
+            self.lengths[len(word)] = self.lengths.get(len(word), 0) | 1 << n
+            for k, letter in enumerate(word):
+                key = (len(word), k, letter)
+                self.index[key] = self.index.get(key, 0) | 1 << n
+        self.letters = sorted(set(letter for word in self.table for letter in word))
+        self.numbers = {word: n for n, word in enumerate(self.table)}
+
+        # Each domain is a bitset over the table, starting with every word
         self.domains = {
-            var: self.crossword.words.copy()
+            var: (1 << len(self.table)) - 1
             for var in self.crossword.variables
         }
 
+        # Every change to a domain is logged here as (variable, previous domain),
+        # so that search can undo it when a branch fails
+        self.trail = []
+
+        # Words used by the assignment being searched, since no word may be used twice
+        self.used = set()
+
+    def domain_words(self, var):
+        """
+        Return a list of the words in the domain of `var`.
+        """
+        words = []
+        bits = self.domains[var]
+        while bits:
+            low = bits & -bits
+            words.append(self.table[low.bit_length() - 1])
+            bits ^= low
+        return words
+
     def letter_grid(self, assignment):
         """
         Return 2D array representing a given assignment.
@@ -99,15 +134,9 @@ class CrosswordCreator():
         (Remove any values that are inconsistent with a variable's unary
          constraints; in this case, the length of the word.)
         """
-        # For every variable in the domains, compare the words in that variables domain
-        # If a word is not equivalent to that variables length, then remove it from the variables domain
+        # For every variable in the domains, keep only the words of that variable's length
         for var in self.domains:
-            invalid = set()
-            for word in self.domains[var]:
-                if len(word) != var.length:
-                    invalid.add(word)
-            for word in invalid:
-                self.domains[var].remove(word)
+            self.domains[var] &= self.lengths.get(var.length, 0)
 
     def revise(self, x, y):
         """
@@ -122,19 +151,16 @@ class CrosswordCreator():
         revised = False
         # If the two variables overlap, then revise them
         if overlap := self.crossword.overlaps[x, y]:
-            invalid_x = set()
-            y_overlap_letters = set()
-            # For every word in y's domain, add the letters at the overlap index for y to the y_overlap variable
-            for word in self.domains[y]:
-                y_overlap_letters.add(word[overlap[1]])
-            # For every word in x's domain, if the letter at the overlap index for x doesn't match a possible
-            # Value for y_letters, then add it to the invalid list to be removed later
-            for word in self.domains[x]:
-                if word[overlap[0]] not in y_overlap_letters:
-                    invalid_x.add(word)
-            # Make revisions if there are any to make
-            for word in invalid_x:
-                self.domains[x].remove(word)
+            # For every letter some word in y's domain has at the overlap index for y,
+            # add the words with that letter at the overlap index for x to the supported words
+            supported = 0
+            for letter in self.letters:
+                if self.domains[y] & self.index.get((y.length, overlap[1], letter), 0):
+                    supported |= self.index.get((x.length, overlap[0], letter), 0)
+            # Make revisions if x's domain has any unsupported words
+            if self.domains[x] & ~supported:
+                self.trail.append((x, self.domains[x]))
+                self.domains[x] &= supported
                 revised = True
         return revised
 
@@ -148,9 +174,9 @@ class CrosswordCreator():
         return False if one or more domains end up empty.
         """
         from queue import Queue
-        # If there is no arc provided, then set the arc equal to all variable combination pairs
-        if not arcs:
-            arcs = [(x, y) for y in self.crossword.variables for x in self.crossword.variables if y != x]
+        # If there is no arc provided, then set the arc equal to every pair of overlapping variables
+        if arcs is None:
+            arcs = [(x, y) for x in self.crossword.variables for y in self.crossword.neighbors(x)]
         # Establish a Queue data structure with each arc in arcs
         initial = Queue()
         [initial.put(arc) for arc in arcs]
@@ -161,7 +187,7 @@ class CrosswordCreator():
         while not initial.empty():
             x, y = initial.get()
             if self.revise(x, y):
-                if len(self.domains[x]) == 0:
+                if not self.domains[x]:
                     return False
                 for neighbor in self.crossword.neighbors(x):
                     if neighbor == y:
@@ -188,19 +214,40 @@ class CrosswordCreator():
         Return True if `assignment` is consistent (i.e., words fit in crossword
         puzzle without conflicting characters); return False otherwise.
         """
+        # Every word must be distinct
+        if len(set(assignment.values())) != len(assignment):
+            return False
         # Check for the given assignment if the words in the assignments satisfy both unary and binary constraints
+        # Unary Constraints (Node consistency), checked first so that overlaps are always in range
         for var in assignment:
-            # Unary Constraints (Node consistency)
             if len(assignment[var]) != var.length:
                 return False
+        for var in assignment:
             # Binary Constraints (Arc Consistent - AC3)
-            for neighbor in  self.crossword.neighbors(var):
+            for neighbor in self.crossword.neighbors(var):
                 if neighbor in assignment:
                     overlap = self.crossword.overlaps[var, neighbor]
                     if assignment[var][overlap[0]] != assignment[neighbor][overlap[1]]:
                         return False
         return True
 
+    def consistent_with(self, var, word, assignment):
+        """
+        Return True if a consistent `assignment` stays consistent when `word`
+        is assigned to `var`, checking only the constraints involving `var`;
+        return False otherwise.
+        """
+        # Unary constraint, and the word must not already be used by another variable
+        if len(word) != var.length or word in self.used:
+            return False
+        # Binary constraints with the assigned neighbors
+        for neighbor in self.crossword.neighbors(var):
+            if neighbor in assignment:
+                overlap = self.crossword.overlaps[var, neighbor]
+                if word[overlap[0]] != assignment[neighbor][overlap[1]]:
+                    return False
+        return True
+
     def order_domain_values(self, var, assignment):
         """
         Return a list of values in the domain of `var`, in order by
@@ -208,18 +255,26 @@ class CrosswordCreator():
         The first value in the list, for example, should be the one
         that rules out the fewest values among the neighbors of `var`.
         """
-        # For every word in the domain of the variable, check it against all neighbors
-        # If the neighbor variable has a word in its domain that would be revised, add 1 to n
+        # For every unassigned neighbor, count the words in its domain with each letter at the overlap
+        counts = []
+        for neighbor in self.crossword.neighbors(var):
+            if neighbor in assignment:
+                continue
+            overlap = self.crossword.overlaps[var, neighbor]
+            domain = self.domains[neighbor]
+            matching = {
+                letter: (domain & self.index.get((neighbor.length, overlap[1], letter), 0)).bit_count()
+                for letter in self.letters
+            }
+            counts.append((overlap[0], domain.bit_count(), matching))
+
+        # For every word in the domain of the variable, the neighbor words without its letter
+        # at the overlap are the ones it would rule out, so add them to n
         new_words = []
-        for word in self.domains[var]:
+        for word in self.domain_words(var):
             n = 0
-            for neighbor in self.crossword.neighbors(var):
-                if neighbor in assignment:
-                    continue
-                for neighbor_word in self.domains[neighbor]:
-                    overlap = self.crossword.overlaps[var, neighbor]
-                    if word[overlap[0]] != neighbor_word[overlap[1]]:
-                        n += 1
+            for position, total, matching in counts:
+                n += total - matching[word[position]]
             # Append this original word to new_words as a tuple where the second item 
             # Is the # of changes it would make to neighbors
             new_words.append((word, n))
@@ -245,12 +300,12 @@ class CrosswordCreator():
             if var in assignment:
                 continue
             # Start with the first variable, and update it if a new variable has a smaller domain of words
-            if start or len(self.domains[var]) < len(self.domains[best_var]):
+            if start or self.domains[var].bit_count() < self.domains[best_var].bit_count():
                 best_var = var
                 start = False
             # If the two variables have the same length domain
             # Choose based on the amount of neighbors (more is better)
-            elif len(self.domains[var]) == len(self.domains[best_var]):
+            elif self.domains[var].bit_count() == self.domains[best_var].bit_count():
                 if len(self.crossword.neighbors(var)) > len(self.crossword.neighbors(best_var)):
                     best_var = var
         return best_var
@@ -262,38 +317,68 @@ class CrosswordCreator():
         crossword and return a complete assignment if possible to do so.
 
         `assignment` is a mapping from variables (keys) to words (values).
+        It is extended in place, and left as it was if the search fails.
 
         If no assignment is possible, return None.
         """
-        # The following is done recursively
         # First check if the assignment provided is consistent, if not, return none
         if not self.consistent(assignment):
             return None
-        # Then check if it is complete, if so, return it
+        # Then search from it, keeping track of the words it uses
+        self.used = set(assignment.values())
+        return self.search(assignment)
+
+    def search(self, assignment):
+        """
+        Extend a consistent `assignment` in place to a complete assignment by
+        backtracking search, and return it; return None if that is impossible.
+
+        Each word is only checked against the constraints involving its
+        variable, since the rest of the assignment is already consistent.
+        """
+        # The following is done recursively
+        # If the assignment is complete, return it
         if self.assignment_complete(assignment):
             return assignment
         # Choose a new variable and order the list of words for that variable
         var = self.select_unassigned_variable(assignment)
         words = self.order_domain_values(var, assignment)
-        # Create a new set of arcs for all of that variables neighbors
-        arcs = [(var, neighbor) for neighbor in self.crossword.neighbors(var)]
+        # Create a new set of arcs from all of that variables unassigned neighbors
+        arcs = [(neighbor, var) for neighbor in self.crossword.neighbors(var) if neighbor not in assignment]
 
         # For each word, ordered by most likely to solve the problem,
-        # Create a new assignment testing if that variable and word are a potential solution
-        # Enforce Arc consistency and check if the new assignment is consistent
-        # If all goes well, continue by backtracking on the new assignment, if not, try the next word
+        # Check if it is consistent with the assignment so far, and assign it in place
+        # Then narrow the variable's domain to the word and make its neighbors arc consistent with it
+        # If all goes well, continue by searching from the assignment, if not, undo every domain
+        # change back to the mark in the trail, and try the next word
         for word in words:
-            new_assignment = assignment.copy()
-            new_assignment.update({var: word})
-
-            if self.consistent(new_assignment) and self.ac3(arcs):
-                
-                result = self.backtrack(new_assignment)
+            if not self.consistent_with(var, word, assignment):
+                continue
+            assignment[var] = word
+            self.used.add(word)
+            mark = len(self.trail)
+            self.trail.append((var, self.domains[var]))
+            self.domains[var] = 1 << self.numbers[word]
+
+            if self.ac3(arcs):
+                result = self.search(assignment)
                 if result:
                     return result
+            self.undo(mark)
+            self.used.remove(word)
+            del assignment[var]
         # If all the words failed, then there must be no result, so return none
         return None
 
+    def undo(self, mark):
+        """
+        Restore `self.domains` to how they were when `self.trail` held
+        `mark` entries, undoing every change logged since.
+        """
+        while len(self.trail) > mark:
+            var, domain = self.trail.pop()
+            self.domains[var] = domain
+
 
 
 def main():
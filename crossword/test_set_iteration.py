@@ -45,6 +45,87 @@ def test_optimization():
     assert len(assignment) == len(crossword.variables)
 
 
+@pytest.mark.parametrize("i", range(4))
+def test_overlaps(i):
+    if i == 3:
+        write_structure3()
+    crossword = generate_crossword(i, 1)
+    for v1 in crossword.variables:
+        for v2 in crossword.variables:
+            if v1 == v2:
+                continue
+            overlap = set(v1.cells).intersection(v2.cells)
+            if overlap:
+                cell, = overlap
+                assert crossword.overlaps[v1, v2] == (v1.cells.index(cell), v2.cells.index(cell))
+                assert v2 in crossword.neighbors(v1)
+            else:
+                assert crossword.overlaps[v1, v2] is None
+                assert v2 not in crossword.neighbors(v1)
+    assert len(crossword.overlaps) == sum(len(crossword.neighbors(v)) for v in crossword.variables)
+
+
+def test_domains():
+    crossword = generate_crossword(0, 1)
+    creator = CrosswordCreator(crossword)
+    creator.enforce_node_consistency()
+    for var in crossword.variables:
+        assert creator.domain_words(var) == sorted(w for w in crossword.words if len(w) == var.length)
+
+    for x in crossword.variables:
+        for y in crossword.neighbors(x):
+            i, j = crossword.overlaps[x, y]
+            letters = set(w[j] for w in creator.domain_words(y))
+            before = creator.domain_words(x)
+            expected = [w for w in before if w[i] in letters]
+            assert creator.revise(x, y) == (expected != before)
+            assert creator.domain_words(x) == expected
+
+    # Words are ordered by how many neighboring words they rule out
+    var = next(iter(crossword.variables))
+    ruled_out = [
+        sum(
+            1 for y in crossword.neighbors(var) for w in creator.domain_words(y)
+            if word[crossword.overlaps[var, y][0]] != w[crossword.overlaps[var, y][1]]
+        )
+        for word in creator.order_domain_values(var, {})
+    ]
+    assert ruled_out == sorted(ruled_out)
+
+
+def test_backtrack_restores_domains():
+    for i, j in invalid_crossword:
+        creator = CrosswordCreator(generate_crossword(i, j))
+        creator.enforce_node_consistency()
+        creator.ac3()
+        domains = dict(creator.domains)
+        trail = list(creator.trail)
+        assignment = {}
+        assert creator.backtrack(assignment) is None
+        assert assignment == {}
+        assert creator.domains == domains
+        assert creator.trail == trail
+
+
+def test_consistent_with():
+    crossword = generate_crossword(0, 1)
+    creator = CrosswordCreator(crossword)
+    assignment = creator.solve()
+    assert creator.consistent(assignment)
+
+    # Reassigning one variable only needs the constraints involving it checked
+    for var in crossword.variables:
+        word = assignment.pop(var)
+        creator.used = set(assignment.values())
+        for other in crossword.words:
+            assert creator.consistent_with(var, other, assignment) == creator.consistent({**assignment, var: other})
+        assignment[var] = word
+
+    # Words may not be reused
+    var, other = list(assignment)[:2]
+    assert not creator.consistent({**assignment, var: assignment[other]})
+
+
 # helper function
 
 
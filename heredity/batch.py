@@ -0,0 +1,200 @@
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from heredity import METHODS, load_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run heredity.py over many family files.")
+    parser.add_argument("paths", nargs="+", help="CSV files, directories of CSV files, or glob patterns")
+    parser.add_argument("--method", choices=METHODS, default="eliminate")
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    for result in run_batch(find_files(args.paths), args.method, args.processes):
+        print(json.dumps(result), flush=True)
+
+
+def find_files(paths):
+    """
+    Return a sorted list of the CSV files named by `paths`, each of which is
+    a file, a directory of CSV files, or a glob pattern.
+    """
+    files = set()
+    for path in paths:
+        if os.path.isdir(path):
+            files.update(glob.glob(os.path.join(path, "*.csv")))
+        elif os.path.exists(path):
+            files.add(path)
+        else:
+            files.update(glob.glob(path, recursive=True))
+    return sorted(files)
+
+
+def run_batch(files, method="eliminate", processes=None):
+    """
+    Solve every family file in `files` with one of `METHODS`, yielding one
+    result dictionary per file as soon as it is available.
+
+    Files are loaded and reduced to their canonical family shape in a pool
+    of `processes` worker processes, a bounded window of files at a time,
+    and each distinct shape is solved only once in the same pool. Each
+    result records the file, its load and solve times, whether its solution
+    came from another file with the same shape, and the probabilities (or
+    the error if the file failed to load or its shape failed to solve).
+    """
+    files = iter(files)
+    window = 4 * (processes or os.cpu_count() or 1)
+    solved = {}
+    waiting = {}
+    with ProcessPoolExecutor(processes) as executor:
+        pending = {}
+        loading = 0
+        while True:
+
+            # Keep up to `window` files loading at once
+            while loading < window and (filename := next(files, None)) is not None:
+                pending[executor.submit(load_shape, filename)] = (filename, None)
+                loading += 1
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                filename, key = pending.pop(future)
+
+                # A loaded file is answered from its shape's solution, or waits for it
+                if key is None:
+                    loading -= 1
+                    try:
+                        key, names, load_seconds = future.result()
+                    except Exception as error:
+                        yield {"file": filename, "error": str(error)}
+                        continue
+                    if key in solved:
+                        yield batch_result(filename, names, load_seconds, solved[key], cached=True)
+                    elif key in waiting:
+                        waiting[key].append((filename, names, load_seconds))
+                    else:
+                        waiting[key] = [(filename, names, load_seconds)]
+                        pending[executor.submit(solve_shape, key, method)] = (filename, key)
+
+                # A solved shape answers every file waiting for it
+                else:
+                    try:
+                        solved[key] = future.result()
+                    except Exception as error:
+                        solved[key] = error
+                    for i, (filename, names, load_seconds) in enumerate(waiting.pop(key)):
+                        yield batch_result(filename, names, load_seconds, solved[key], cached=i > 0)
+
+
+def load_shape(filename):
+    """
+    Load the family file `filename` and return a tuple (key, names,
+    seconds) of its canonical family shape and the time taken.
+    """
+    start = time.perf_counter()
+    key, names = canonical_family(load_data(filename))
+    return key, names, time.perf_counter() - start
+
+
+def batch_result(filename, names, load_seconds, solution, cached):
+    """
+    Return the result dictionary of `run_batch` for a file whose people, in
+    canonical order, are `names`, given its shape's `solution`: either a
+    tuple (probabilities, seconds) from `solve_shape` or the error raised.
+    """
+    if isinstance(solution, Exception):
+        return {"file": filename, "error": str(solution)}
+    probabilities, solve_seconds = solution
+    return {
+        "file": filename,
+        "people": len(names),
+        "load_seconds": load_seconds,
+        "solve_seconds": 0 if cached else solve_seconds,
+        "cached": cached,
+        "probabilities": {
+            name: probabilities[str(j)] for j, name in enumerate(names)
+        },
+    }
+
+
+def solve_shape(key, method):
+    """
+    Solve the family described by canonical `key` with one of `METHODS`.
+    Return a tuple (probabilities, seconds), with people named by their
+    canonical index.
+    """
+    start = time.perf_counter()
+    people = {
+        str(i): {
+            "name": str(i),
+            "mother": None if mother is None else str(mother),
+            "father": None if father is None else str(father),
+            "trait": trait,
+        }
+        for i, (trait, mother, father) in enumerate(key)
+    }
+    probabilities = METHODS[method](people)
+    return probabilities, time.perf_counter() - start
+
+
+def canonical_family(people):
+    """
+    Return a tuple (key, names) describing the shape of a family and its
+    evidence independently of people's names.
+
+    `names` lists everyone in a canonical order, and `key` holds a tuple
+    (trait, mother's index, father's index) for each person in that order.
+    The order comes from refining each person's known trait by the classes
+    of their parents and of their children (and whether they are the
+    children's mother or father) until no more people can be told apart,
+    with ties broken by file order. Equal keys always describe the same
+    family; a family whose people cannot all be told apart may still get a
+    different key when its rows are in a different order.
+    """
+    names = list(people)
+    children = {person: [] for person in names}
+    for person in names:
+        for role in ("mother", "father"):
+            if people[person][role]:
+                children[people[person][role]].append((person, role))
+
+    # Refine classes until the number of distinct classes stops growing
+    classes = {person: repr(people[person]["trait"]) for person in names}
+    while True:
+        signatures = {
+            person: (
+                classes[person],
+                classes.get(people[person]["mother"]),
+                classes.get(people[person]["father"]),
+                tuple(sorted((classes[child], role) for child, role in children[person]))
+            )
+            for person in names
+        }
+        ranks = {signature: i for i, signature in enumerate(sorted(set(signatures.values()), key=repr))}
+        refined = {person: str(ranks[signatures[person]]) for person in names}
+        if len(ranks) == len(set(classes.values())):
+            break
+        classes = refined
+
+    order = sorted(names, key=lambda person: int(refined[person]))
+    index = {person: i for i, person in enumerate(order)}
+    key = tuple(
+        (
+            people[person]["trait"],
+            index.get(people[person]["mother"]),
+            index.get(people[person]["father"])
+        )
+        for person in order
+    )
+    return key, order
+
+
+if __name__ == "__main__":
+    main()
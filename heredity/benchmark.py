@@ -0,0 +1,203 @@
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from heredity import (GENES, METHODS, PROBS, families, gene_factors, induced_width,
+                      inheritance_table, min_fill_order, trait_table)
+
+SIZES = [4, 6, 8, 25, 50, 100, 200, 400]
+GENERATIONS = 6
+EVIDENCE = 0.5
+MARRY_IN = 0.3
+ENUMERATION_LIMIT = 8
+ENUMERATION_METHODS = {"enumerate", "log-enumerate", "batch", "families"}
+WIDTH_LIMIT = 8
+ELIMINATION_METHODS = {"eliminate", "log"}
+REFERENCE = "log"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark heredity.py on synthetic pedigrees.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--generations", type=int, default=GENERATIONS)
+    parser.add_argument("--evidence", type=float, default=EVIDENCE, help="fraction of people with a known trait")
+    parser.add_argument("--marry-in", type=float, default=MARRY_IN,
+                        help="fraction of people who marry a new founder rather than someone in the pedigree")
+    parser.add_argument("--methods", nargs="+", choices=METHODS, default=list(METHODS))
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--save", help="directory to also write each generated pedigree to as a CSV file")
+    parser.add_argument("--output", help="file to append JSON lines to (default: standard output)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    output = open(args.output, "a") if args.output else sys.stdout
+    try:
+        for size in args.sizes:
+            people = generate_pedigree(size, args.generations, args.evidence, args.marry_in, rng)
+            if args.save:
+                save_pedigree(people, os.path.join(args.save, f"pedigree{size}.csv"))
+            for result in run_benchmarks(people, args.methods):
+                print(json.dumps(result), file=output, flush=True)
+    finally:
+        if args.output:
+            output.close()
+
+
+def generate_pedigree(size, generations=GENERATIONS, evidence=EVIDENCE,
+                      marry_in=MARRY_IN, rng=random):
+    """
+    Return a random connected pedigree of `size` people descended from one
+    founding couple over about `generations` generations, in the form
+    returned by `load_data`. (Two people cannot be connected, so a pedigree
+    of size 2 is an unmarried couple.)
+
+    Each couple has several children, with the people of each generation
+    split evenly between the generations. A `marry_in` fraction of children
+    marry a new founder, and the rest marry another child of the same
+    generation from a different couple where possible, joining branches of
+    the pedigree together. Genes and traits are drawn from `PROBS`, and each
+    person's trait is known with probability `evidence`.
+    """
+    inheritance = inheritance_table()
+    likelihood = trait_table()
+    people = {}
+    genes = {}
+
+    def add(mother=None, father=None):
+        name = f"Person{len(people)}"
+        if mother is None:
+            weights = [PROBS["gene"][g] for g in GENES]
+        else:
+            weights = [inheritance[g, genes[mother], genes[father]] for g in GENES]
+        genes[name] = rng.choices(GENES, weights=weights)[0]
+        trait = rng.random() < likelihood[genes[name], True]
+        people[name] = {
+            "name": name,
+            "mother": mother,
+            "father": father,
+            "trait": trait if rng.random() < evidence else None
+        }
+        return name
+
+    if size < 3:
+        for _ in range(size):
+            add()
+        return people
+    # Couples are [mother, father], where a father of None is a new founder
+    # who only joins the pedigree once the couple has a child
+    first = [add(), add()]
+    couples = [first]
+    per_generation = max(1, -(-(size - 2) // max(generations - 1, 1)))
+    while len(people) < size:
+
+        # Give every couple a child, spreading the rest of this generation's
+        # children over the couples at random
+        count = max(len(couples), round(per_generation / (1 + marry_in)))
+        parents = list(range(len(couples))) + rng.choices(range(len(couples)), k=count - len(couples))
+        children = []
+        for family in parents:
+            couple = couples[family]
+            if couple[1] is None:
+                if len(people) + 2 > size:
+                    continue
+                couple[1] = add()
+            if len(people) < size:
+                children.append((add(*couple), family))
+
+        # With room for only one more person, they are another child of the first couple
+        if not children:
+            add(*first)
+            break
+
+        # Pair children of different couples with each other, and marry the
+        # `marry_in` fraction, and any child left without a partner, to new founders
+        rng.shuffle(children)
+        couples = []
+        single = []
+        for child, family in children:
+            if rng.random() < marry_in:
+                couples.append([child, None])
+                continue
+            partner = next((i for i, (_, other) in enumerate(single) if other != family), None)
+            if partner is None:
+                single.append((child, family))
+            else:
+                couples.append([single.pop(partner)[0], child])
+        couples.extend([child, None] for child, _ in single)
+
+    return people
+
+
+def save_pedigree(people, filename):
+    """
+    Write `people` to a CSV file in the format read by `load_data`.
+    """
+    with open(filename, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "mother", "father", "trait"])
+        for person in people.values():
+            trait = "" if person["trait"] is None else int(person["trait"])
+            writer.writerow([person["name"], person["mother"] or "", person["father"] or "", trait])
+
+
+def run_benchmarks(people, methods):
+    """
+    Run each of `methods` on `people` and return a list of result
+    dictionaries with runtime, peak memory and the largest error of any
+    marginal against the exact `REFERENCE` method.
+
+    Each method runs twice: once for wall time, and once under tracemalloc
+    for peak memory. Enumeration methods are skipped once the people (or,
+    for "families", the largest family) outnumber `ENUMERATION_LIMIT`, and
+    elimination methods once the induced width of the pedigree's min-fill
+    order is above `WIDTH_LIMIT`. If the reference itself is skipped, the
+    largest error is None.
+    """
+    largest = max(len(family) for family in families(people))
+    scopes = [variables for variables, _ in gene_factors(people)]
+    width = induced_width(scopes, min_fill_order(scopes))
+
+    def skipped(method):
+        size = largest if method == "families" else len(people)
+        if method in ENUMERATION_METHODS and size > ENUMERATION_LIMIT:
+            return f"more than {ENUMERATION_LIMIT} people to enumerate"
+        if method in ELIMINATION_METHODS and width > WIDTH_LIMIT:
+            return f"induced width above {WIDTH_LIMIT}"
+        return None
+
+    reference = None if skipped(REFERENCE) else METHODS[REFERENCE](people)
+
+    results = []
+    for method in methods:
+        result = {"method": method, "people": len(people), "largest_family": largest, "induced_width": width}
+        if reason := skipped(method):
+            result["skipped"] = reason
+            results.append(result)
+            continue
+
+        start = time.perf_counter()
+        probabilities = METHODS[method](people)
+        result["seconds"] = time.perf_counter() - start
+
+        tracemalloc.start()
+        METHODS[method](people)
+        result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        result["max_error"] = None if reference is None else max(
+            abs(probabilities[person][field][value] - reference[person][field][value])
+            for person in people
+            for field in reference[person]
+            for value in reference[person][field]
+        )
+        results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,11 @@
 import csv
+import functools
 import itertools
+import math
+import random
 import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 
 PROBS = {
 
@@ -36,53 +41,27 @@ PROBS = {
     "mutation": 0.01
 }
 
+GENES = (0, 1, 2)
+BATCH_SIZE = 4096
+SAMPLES = 10000
+CHECK_EVERY = 1000
+BURN_IN = 100
+
+# Dense probability totals have one row per person: a column per gene count, then one per trait value
+WIDTH = 5
+TRAIT_COLUMNS = {True: 3, False: 4}
+
 
 def main():
 
     # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
+    if len(sys.argv) not in [2, 3] or (len(sys.argv) == 3 and sys.argv[2] not in METHODS):
+        sys.exit(f"Usage: python heredity.py data.csv [{'|'.join(METHODS)}]")
     people = load_data(sys.argv[1])
+    method = METHODS[sys.argv[2] if len(sys.argv) == 3 else "enumerate"]
 
-    # Keep track of gene and trait probabilities for each person
-    probabilities = {
-        person: {
-            "gene": {
-                2: 0,
-                1: 0,
-                0: 0
-            },
-            "trait": {
-                True: 0,
-                False: 0
-            }
-        }
-        for person in people
-    }
-
-    # Loop over all sets of people who might have the trait
-    names = set(people)
-    for have_trait in powerset(names):
-
-        # Check if current set of people violates known information
-        fails_evidence = any(
-            (people[person]["trait"] is not None and
-             people[person]["trait"] != (person in have_trait))
-            for person in names
-        )
-        if fails_evidence:
-            continue
-
-        # Loop over all sets of people who might have the gene
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):
-
-                # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
-
-    # Ensure probabilities sum to 1
-    normalize(probabilities)
+    # Compute gene and trait probabilities for each person
+    probabilities = method(people)
 
     # Print results
     for person in people:
@@ -94,6 +73,72 @@ def main():
                 print(f"    {value}: {p:.4f}")
 
 
+def enumerate_probabilities(people, log_space=False):
+    """
+    Return gene and trait probabilities for each person by enumerating
+    every joint assignment of genes and traits consistent with the evidence.
+
+    If `log_space` is true, joint probabilities and their totals are kept as
+    logs and added up with log-sum-exp, so that large families do not
+    underflow.
+    """
+    if log_space:
+        probability, add, finish = log_joint_probability, log_accumulate, log_normalize_totals
+    else:
+        probability, add, finish = joint_probability, accumulate, normalize_totals
+
+    # Keep track of gene and trait probabilities for each person by ID
+    names = list(people)
+    if log_space:
+        totals = array("d", [-math.inf]) * (WIDTH * len(names))
+    else:
+        totals = array("d", bytes(8 * WIDTH * len(names)))
+
+    # People with a known trait keep it in every assignment, so only
+    # the traits of the remaining people are enumerated
+    known = {person for person in names if people[person]["trait"]}
+    known_mask = sum(1 << i for i, person in enumerate(names) if person in known)
+    unknown = [person for person in names if people[person]["trait"] is None]
+    unknown_ids = [names.index(person) for person in unknown]
+    everyone = (1 << len(names)) - 1
+
+    # Loop over bitmasks of people who might have the trait
+    for trait_mask in range(1 << len(unknown)):
+        have_trait = known | members(unknown, trait_mask)
+        have_trait_mask = known_mask | sum(
+            1 << i for k, i in enumerate(unknown_ids) if trait_mask >> k & 1
+        )
+
+        # Loop over bitmasks of people with one gene, and every subset of the
+        # rest of the people as those with two genes
+        for one_mask in range(1 << len(names)):
+            one_gene = members(names, one_mask)
+            rest = everyone & ~one_mask
+            two_mask = rest
+            while True:
+                two_genes = members(names, two_mask)
+
+                # Update probabilities with new joint probability
+                p = probability(people, one_gene, two_genes, have_trait)
+                add(totals, one_mask, two_mask, have_trait_mask, p)
+
+                if not two_mask:
+                    break
+                two_mask = (two_mask - 1) & rest
+
+    # Ensure probabilities sum to 1
+    finish(totals)
+    return totals_to_probabilities(names, totals)
+
+
+def log_enumerate_probabilities(people):
+    """
+    Return gene and trait probabilities for each person by enumeration in
+    log space.
+    """
+    return enumerate_probabilities(people, log_space=True)
+
+
 def load_data(filename):
     """
     Load gene and trait data from a file into a dictionary.
@@ -128,6 +173,13 @@ def powerset(s):
     ]
 
 
+def members(names, mask):
+    """
+    Return the set of names in list `names` whose bits are set in `mask`.
+    """
+    return {name for i, name in enumerate(names) if mask >> i & 1}
+
+
 def joint_probability(people, one_gene, two_genes, have_trait):
     """
     Compute and return a joint probability.
@@ -139,31 +191,48 @@ def joint_probability(people, one_gene, two_genes, have_trait):
         * everyone in set `have_trait` has the trait, and
         * everyone not in set` have_trait` does not have the trait.
     """
-    local_probability = {}
-    no_gene = [person for person in people if person not in one_gene and person not in two_genes]
+    inheritance = inheritance_table()
+    likelihood = trait_table()
+
+    def gene(person):
+        return 1 if person in one_gene else 2 if person in two_genes else 0
 
-    for person in people:
-        gene = 0 if person in no_gene else 1 if person in one_gene else 2
-        trait = True if person in have_trait else False
-        if not people[person]["mother"] and not people[person]["father"]:
-            gene_prob = PROBS["gene"][gene]
-        else:        
-            m_gene_prob = .01 if people[person]['mother'] in no_gene else .5 if people[person]['mother'] in one_gene else .99
-            f_gene_prob = .01 if people[person]['father'] in no_gene else .5 if people[person]['father'] in one_gene else .99
-            if gene == 2:
-                gene_prob = m_gene_prob * f_gene_prob
-            elif gene == 1:
-                gene_prob = (m_gene_prob * (1-f_gene_prob)) + (f_gene_prob * (1-m_gene_prob))
-            elif gene == 0:
-                gene_prob = (1-m_gene_prob) * (1-f_gene_prob)
-        local_probability[person] = gene_prob * PROBS["trait"][gene][trait]
-            
     probability = 1
-    for person in local_probability:
-        probability *= local_probability[person]
+    for person in people:
+        mother = people[person]["mother"]
+        father = people[person]["father"]
+        if not mother and not father:
+            gene_prob = PROBS["gene"][gene(person)]
+        else:
+            gene_prob = inheritance[gene(person), gene(mother), gene(father)]
+        probability *= gene_prob * likelihood[gene(person), person in have_trait]
     return probability
 
 
+def log_joint_probability(people, one_gene, two_genes, have_trait):
+    """
+    Return the natural log of `joint_probability`, summing the logs of each
+    person's probabilities so that large families do not underflow to 0.
+    """
+    inheritance = log_table(inheritance_table())
+    likelihood = log_table(trait_table())
+    prior = log_table(PROBS["gene"])
+
+    def gene(person):
+        return 1 if person in one_gene else 2 if person in two_genes else 0
+
+    log_probability = 0
+    for person in people:
+        mother = people[person]["mother"]
+        father = people[person]["father"]
+        if not mother and not father:
+            log_probability += prior[gene(person)]
+        else:
+            log_probability += inheritance[gene(person), gene(mother), gene(father)]
+        log_probability += likelihood[gene(person), person in have_trait]
+    return log_probability
+
+
 def update(probabilities, one_gene, two_genes, have_trait, p):
     """
     Add to `probabilities` a new joint probability `p`.
@@ -171,11 +240,9 @@ def update(probabilities, one_gene, two_genes, have_trait, p):
     Which value for each distribution is updated depends on whether
     the person is in `have_gene` and `have_trait`, respectively.
     """
-    no_gene = [person for person in probabilities if person not in one_gene and person not in two_genes]
-    
     for person in probabilities:
         trait = True if person in have_trait else False
-        gene = 0 if person in no_gene else 1 if person in one_gene else 2 
+        gene = 1 if person in one_gene else 2 if person in two_genes else 0
         probabilities[person]['gene'][gene] += p
         probabilities[person]['trait'][trait] += p
 
@@ -204,5 +271,766 @@ def normalize(probabilities):
     
 
 
+def accumulate(totals, one_mask, two_mask, trait_mask, p):
+    """
+    Add a new joint probability `p` to the dense `totals` of
+    `enumerate_probabilities`, for the assignment where the people whose
+    IDs are set in `one_mask`, `two_mask` and `trait_mask` have one gene,
+    two genes and the trait, respectively.
+    """
+    for row in range(0, len(totals), WIDTH):
+        i = row // WIDTH
+        gene = 1 if one_mask >> i & 1 else 2 if two_mask >> i & 1 else 0
+        totals[row + gene] += p
+        totals[row + TRAIT_COLUMNS[bool(trait_mask >> i & 1)]] += p
+
+
+def normalize_totals(totals):
+    """
+    Update dense `totals`, with one row of `WIDTH` columns per person,
+    such that each person's gene and trait distributions sum to 1.
+    """
+    for row in range(0, len(totals), WIDTH):
+        gene_total = totals[row] + totals[row + 1] + totals[row + 2]
+        trait_total = totals[row + 3] + totals[row + 4]
+        totals[row:row + WIDTH] = array("d", (
+            totals[row] / gene_total,
+            totals[row + 1] / gene_total,
+            totals[row + 2] / gene_total,
+            totals[row + 3] / trait_total,
+            totals[row + 4] / trait_total,
+        ))
+
+
+def log_accumulate(totals, one_mask, two_mask, trait_mask, log_p):
+    """
+    Add a new joint probability, given as its log `log_p`, to dense `totals`
+    of log probabilities, for the assignment described as in `accumulate`.
+    """
+    if log_p == -math.inf:
+        return
+    for row in range(0, len(totals), WIDTH):
+        i = row // WIDTH
+        gene = 1 if one_mask >> i & 1 else 2 if two_mask >> i & 1 else 0
+        for column in (row + gene, row + TRAIT_COLUMNS[bool(trait_mask >> i & 1)]):
+
+            # Add the larger of the two logs to the log of one plus the other's ratio to it
+            total = totals[column]
+            if total >= log_p:
+                totals[column] = total + math.log1p(math.exp(log_p - total))
+            else:
+                totals[column] = log_p + math.log1p(math.exp(total - log_p))
+
+
+def log_normalize_totals(totals):
+    """
+    Update dense `totals` of log probabilities, with one row of `WIDTH`
+    columns per person, to probabilities such that each person's gene and
+    trait distributions sum to 1.
+    """
+    for row in range(0, len(totals), WIDTH):
+        gene_total = log_sum_exp(totals[row:row + 3])
+        trait_total = log_sum_exp(totals[row + 3:row + 5])
+        totals[row:row + WIDTH] = array("d", (
+            math.exp(totals[row] - gene_total),
+            math.exp(totals[row + 1] - gene_total),
+            math.exp(totals[row + 2] - gene_total),
+            math.exp(totals[row + 3] - trait_total),
+            math.exp(totals[row + 4] - trait_total),
+        ))
+
+
+def totals_to_probabilities(names, totals):
+    """
+    Return dense `totals` for the people in list `names` as a dictionary
+    of gene and trait distributions keyed by name.
+    """
+    return {
+        person: {
+            "gene": {g: totals[WIDTH * i + g] for g in sorted(GENES, reverse=True)},
+            "trait": {
+                trait: totals[WIDTH * i + column]
+                for trait, column in TRAIT_COLUMNS.items()
+            }
+        }
+        for i, person in enumerate(names)
+    }
+
+
+def eliminate_probabilities(people, log_space=False):
+    """
+    Return gene and trait probabilities for each person by variable
+    elimination over the family's Bayesian network.
+
+    Each person's gene count is a variable with a factor conditioned on
+    their mother's and father's genes (or an unconditional factor), and each
+    known trait adds a factor over that person's gene. Unknown traits have
+    no effect on anyone's genes, so they are left out of the network and
+    their distribution is computed from the gene distribution afterwards.
+
+    Genes are eliminated in min-fill order, each into a bucket holding the
+    factors it is the first variable of. A forward pass sends each bucket's
+    summed-out product to the bucket of its next variable, and a backward
+    pass sends messages back, so every person's marginal comes from the
+    same two passes instead of one elimination per person.
+
+    If `log_space` is true, factors hold log probabilities and are summed
+    out with log-sum-exp, so that very large families do not underflow.
+    """
+    factors = gene_factors(people, log_space)
+    merge = log_combine if log_space else combine
+    order = min_fill_order([variables for variables, _ in factors])
+    position = {variable: i for i, variable in enumerate(order)}
+
+    # Place each factor in the bucket of its first variable in the order
+    buckets = {variable: [] for variable in order}
+    for factor in factors:
+        buckets[min(factor[0], key=position.get)].append(factor)
+
+    # Forward pass: sum each bucket's variable out of the product of its factors
+    # and send the result to the bucket of its first remaining variable
+    upward = {}
+    children = {variable: [] for variable in order}
+    for variable in order:
+        bucket = buckets[variable] + [upward[child] for child in children[variable]]
+        message = merge(bucket, keep=set(factor_scope(bucket)) - {variable})
+        upward[variable] = message
+        if message[0]:
+            children[min(message[0], key=position.get)].append(variable)
+
+    # Backward pass: send each bucket everything from the rest of the network
+    downward = {}
+    for variable in reversed(order):
+        received = buckets[variable] + ([downward[variable]] if variable in downward else [])
+        for child in children[variable]:
+            others = [upward[c] for c in children[variable] if c != child]
+            downward[child] = merge(received + others, keep=set(upward[child][0]))
+
+    probabilities = {}
+    for person in people:
+
+        # Combine everything that reaches this person's bucket
+        incoming = [upward[child] for child in children[person]]
+        if person in downward:
+            incoming.append(downward[person])
+        _, table = merge(buckets[person] + incoming, keep={person})
+        weights = [table[(g,)] for g in GENES]
+        if log_space:
+            top = max(weights)
+            weights = [math.exp(weight - top) for weight in weights]
+        probabilities[person] = person_probabilities(people[person], weights)
+    return probabilities
+
+
+def log_eliminate_probabilities(people):
+    """
+    Return gene and trait probabilities for each person by variable
+    elimination in log space.
+    """
+    return eliminate_probabilities(people, log_space=True)
+
+
+def person_probabilities(person, gene):
+    """
+    Return the gene and trait distributions of `person`, a row of the
+    dictionary returned by `load_data`, given unnormalized weights `gene`
+    of each gene count.
+
+    Known traits are certain; unknown traits only depend on the person's
+    own gene, so their distribution follows from the gene distribution.
+    """
+    likelihood = trait_table()
+    total = sum(gene)
+    gene = [weight / total for weight in gene]
+    if person["trait"] is None:
+        have_trait = sum(gene[g] * likelihood[g, True] for g in GENES)
+    else:
+        have_trait = 1.0 if person["trait"] else 0.0
+    return {
+        "gene": {g: gene[g] for g in sorted(GENES, reverse=True)},
+        "trait": {True: have_trait, False: 1 - have_trait}
+    }
+
+
+def inheritance_table():
+    """
+    Return a dictionary mapping each tuple (gene, mother's gene, father's
+    gene) to the probability of a child having `gene` copies of the gene,
+    for the mutation probability in `PROBS`.
+
+    The table is built once per mutation probability and shared between
+    callers, so it must not be modified.
+    """
+    return build_inheritance_table(PROBS["mutation"])
+
+
+def trait_table():
+    """
+    Return a dictionary mapping each tuple (gene, trait) to the probability
+    of a person with `gene` copies of the gene having that trait value, for
+    the trait probabilities in `PROBS`.
+
+    The table is built once per set of trait probabilities and shared
+    between callers, so it must not be modified.
+    """
+    return build_trait_table(tuple(
+        (g, trait, PROBS["trait"][g][trait])
+        for g in GENES for trait in (True, False)
+    ))
+
+
+@functools.lru_cache(maxsize=None)
+def build_trait_table(entries):
+    """
+    Return the table for `trait_table` from a tuple of (gene, trait, probability) entries.
+    """
+    return {(g, trait): p for g, trait, p in entries}
+
+
+@functools.lru_cache(maxsize=None)
+def build_inheritance_table(mutation):
+    """
+    Return the table for `inheritance_table` for a given mutation probability.
+    """
+    passes = {0: mutation, 1: 0.5, 2: 1 - mutation}
+
+    table = {}
+    for m, f in itertools.product(GENES, repeat=2):
+        from_mother, from_father = passes[m], passes[f]
+        table[0, m, f] = (1 - from_mother) * (1 - from_father)
+        table[1, m, f] = from_mother * (1 - from_father) + from_father * (1 - from_mother)
+        table[2, m, f] = from_mother * from_father
+    return table
+
+
+def gene_factors(people, log_space=False):
+    """
+    Return the factors of the family's Bayesian network over gene counts.
+
+    A factor is a tuple (variables, table), where `variables` is a tuple of
+    names and `table` maps each tuple of their gene counts to a probability,
+    or to its log if `log_space` is true.
+    """
+    inheritance = inheritance_table()
+    likelihood = trait_table()
+    prior = PROBS["gene"]
+    if log_space:
+        inheritance, likelihood, prior = log_table(inheritance), log_table(likelihood), log_table(prior)
+
+    factors = []
+    for person in people:
+        mother = people[person]["mother"]
+        father = people[person]["father"]
+        trait = people[person]["trait"]
+
+        # Probability of the gene given the parents' genes, or unconditionally
+        if not mother and not father:
+            factors.append(((person,), {(g,): prior[g] for g in GENES}))
+        else:
+            factors.append(((person, mother, father), inheritance))
+
+        # Probability of the known trait given the gene
+        if trait is not None:
+            factors.append(((person,), {(g,): likelihood[g, trait] for g in GENES}))
+    return factors
+
+
+def min_fill_order(scopes):
+    """
+    Return an elimination order for all variables in the factor `scopes`,
+    greedily choosing the variable whose elimination adds the fewest new
+    edges between its neighbors, breaking ties by fewest neighbors.
+    """
+    neighbors = {}
+    for scope in scopes:
+        for variable in scope:
+            neighbors.setdefault(variable, set()).update(v for v in scope if v != variable)
+
+    def fill(variable):
+        adjacent = list(neighbors[variable])
+        return sum(
+            1 for i, a in enumerate(adjacent) for b in adjacent[i + 1:]
+            if b not in neighbors[a]
+        )
+
+    order = []
+    while neighbors:
+        variable = min(neighbors, key=lambda v: (fill(v), len(neighbors[v])))
+        adjacent = neighbors.pop(variable)
+        for a in adjacent:
+            neighbors[a].discard(variable)
+            neighbors[a].update(adjacent - {a})
+        order.append(variable)
+    return order
+
+
+def induced_width(scopes, order):
+    """
+    Return the induced width of eliminating the variables of the factor
+    `scopes` in `order`: the most other variables any variable shares a
+    factor with when it is eliminated. Eliminating it costs time and memory
+    that grow as 3 to the power of one more than that.
+    """
+    neighbors = {}
+    for scope in scopes:
+        for variable in scope:
+            neighbors.setdefault(variable, set()).update(v for v in scope if v != variable)
+
+    width = 0
+    for variable in order:
+        adjacent = neighbors.pop(variable)
+        width = max(width, len(adjacent))
+        for a in adjacent:
+            neighbors[a].discard(variable)
+            neighbors[a].update(adjacent - {a})
+    return width
+
+
+def combine(factors, keep):
+    """
+    Multiply `factors` together and sum out every variable not in `keep`.
+    Return the resulting factor.
+    """
+    variables = factor_scope(factors)
+    kept = [i for i, variable in enumerate(variables) if variable in keep]
+    positions = [[variables.index(v) for v in scope] for scope, _ in factors]
+
+    table = {}
+    for values in itertools.product(GENES, repeat=len(variables)):
+        p = 1
+        for (_, factor_table), indices in zip(factors, positions):
+            p *= factor_table[tuple(values[i] for i in indices)]
+        key = tuple(values[i] for i in kept)
+        table[key] = table.get(key, 0) + p
+
+    return tuple(variables[i] for i in kept), table
+
+
+def log_combine(factors, keep):
+    """
+    Multiply `factors` of log probabilities together, by adding their logs,
+    and sum out every variable not in `keep` with log-sum-exp.
+    Return the resulting factor.
+    """
+    variables = factor_scope(factors)
+    kept = [i for i, variable in enumerate(variables) if variable in keep]
+    positions = [[variables.index(v) for v in scope] for scope, _ in factors]
+
+    terms = {}
+    for values in itertools.product(GENES, repeat=len(variables)):
+        log_p = 0
+        for (_, factor_table), indices in zip(factors, positions):
+            log_p += factor_table[tuple(values[i] for i in indices)]
+        terms.setdefault(tuple(values[i] for i in kept), []).append(log_p)
+
+    table = {key: log_sum_exp(values) for key, values in terms.items()}
+    return tuple(variables[i] for i in kept), table
+
+
+def log_sum_exp(values):
+    """
+    Return the log of the sum of the exponentials of `values`, shifting by
+    the largest value so that the exponentials cannot all underflow.
+    """
+    top = max(values)
+    if top == -math.inf:
+        return top
+    return top + math.log(sum(math.exp(value - top) for value in values))
+
+
+def log_table(table):
+    """
+    Return a copy of `table` with each probability replaced by its log,
+    using negative infinity for impossible entries.
+
+    The copy is built once per set of entries and shared between callers,
+    so it must not be modified.
+    """
+    return build_log_table(tuple(table.items()))
+
+
+@functools.lru_cache(maxsize=None)
+def build_log_table(entries):
+    """
+    Return the table for `log_table` from a tuple of (key, probability) entries.
+    """
+    return {key: math.log(p) if p > 0 else -math.inf for key, p in entries}
+
+
+def factor_scope(factors):
+    """
+    Return a list of every variable in `factors`, in order of first appearance.
+    """
+    variables = []
+    for scope, _ in factors:
+        variables.extend(v for v in scope if v not in variables)
+    return variables
+
+
+def batch_enumerate_probabilities(people, batch_size=BATCH_SIZE):
+    """
+    Return gene and trait probabilities for each person by enumerating
+    every joint assignment consistent with the evidence in batches of
+    `batch_size`, scored by `joint_probabilities`.
+    """
+    totals = array("d", bytes(8 * WIDTH * len(people)))
+
+    # Every gene count for everyone, with traits only varying for people whose trait is unknown
+    traits = [
+        (True, False) if people[person]["trait"] is None else (people[person]["trait"],)
+        for person in people
+    ]
+    assignments = itertools.product(
+        itertools.product(GENES, repeat=len(people)),
+        itertools.product(*traits)
+    )
+
+    while batch := list(itertools.islice(assignments, batch_size)):
+        genes = [gene for gene, _ in batch]
+        traits = [trait for _, trait in batch]
+        p = joint_probabilities(people, genes, traits)
+        update_batch(totals, genes, traits, p)
+
+    # Ensure probabilities sum to 1
+    normalize_totals(totals)
+    return totals_to_probabilities(list(people), totals)
+
+
+def joint_probabilities(people, genes, traits):
+    """
+    Compute and return the joint probabilities of a batch of assignments.
+
+    `genes` and `traits` hold one tuple per assignment, with the gene count
+    and trait of each person in the order of `people`. Each person's
+    probability table is looked up once for the whole batch, with the
+    parents found by index rather than by name.
+    """
+    names = list(people)
+    index = {person: i for i, person in enumerate(names)}
+    inheritance = inheritance_table()
+    likelihood = trait_table()
+
+    probabilities = [1] * len(genes)
+    for i, person in enumerate(names):
+        mother = people[person]["mother"]
+        father = people[person]["father"]
+        column = [gene[i] for gene in genes]
+        trait_column = [trait[i] for trait in traits]
+
+        if not mother and not father:
+            local = [PROBS["gene"][g] for g in column]
+        else:
+            m, f = index[mother], index[father]
+            local = [
+                inheritance[g, gene[m], gene[f]]
+                for g, gene in zip(column, genes)
+            ]
+        probabilities = [
+            p * gene_p * likelihood[g, t]
+            for p, gene_p, g, t in zip(probabilities, local, column, trait_column)
+        ]
+    return probabilities
+
+
+def update_batch(totals, genes, traits, p):
+    """
+    Add to dense `totals`, with one row of `WIDTH` columns per person, the
+    joint probabilities `p` of a batch of assignments, given as in
+    `joint_probabilities`.
+    """
+    for row in range(0, len(totals), WIDTH):
+        i = row // WIDTH
+        for gene, trait, joint in zip(genes, traits, p):
+            totals[row + gene[i]] += joint
+            totals[row + TRAIT_COLUMNS[trait[i]]] += joint
+
+
+def families(people):
+    """
+    Split `people` into families: groups of people connected through
+    mother and father links. Return a list of dictionaries in the form
+    returned by `load_data`, one per family.
+    """
+    relatives = {person: set() for person in people}
+    for person in people:
+        for parent in (people[person]["mother"], people[person]["father"]):
+            if parent:
+                relatives[person].add(parent)
+                relatives[parent].add(person)
+
+    # Collect everyone reachable from each person not yet in a family
+    groups = []
+    seen = set()
+    for person in people:
+        if person in seen:
+            continue
+        seen.add(person)
+        family = []
+        frontier = [person]
+        while frontier:
+            member = frontier.pop()
+            family.append(member)
+            for relative in relatives[member] - seen:
+                seen.add(relative)
+                frontier.append(relative)
+        groups.append(family)
+
+    # Keep each family's people in their original order
+    family_of = {member: i for i, family in enumerate(groups) for member in family}
+    split = [{} for _ in groups]
+    for person in people:
+        split[family_of[person]][person] = people[person]
+    return split
+
+
+def family_probabilities(people, method="enumerate", processes=None):
+    """
+    Return gene and trait probabilities for each person by solving each
+    family in `people` on its own with one of `METHODS`, since unrelated
+    families do not affect each other.
+
+    If `processes` is given and there is more than one family, families are
+    solved in a pool of that many worker processes.
+    """
+    groups = families(people)
+    solve = METHODS[method]
+    if processes and len(groups) > 1:
+        with ProcessPoolExecutor(processes) as executor:
+            results = list(executor.map(solve, groups))
+    else:
+        results = [solve(family) for family in groups]
+
+    merged = {}
+    for result in results:
+        merged.update(result)
+    return {person: merged[person] for person in people}
+
+
+def likelihood_weighting(people, samples=SAMPLES, error=None, diagnostics=None):
+    """
+    Return approximate gene and trait probabilities for each person by
+    likelihood weighting.
+
+    Each sample draws everyone's genes from their parents' genes (or
+    unconditionally), and is weighted by the probability of the known
+    traits given those genes. Sampling stops after `samples` samples, or
+    once the largest standard error of any gene probability is below
+    `error`. If `diagnostics` is a dictionary, the number of samples, the
+    standard error and the effective sample size are stored in it.
+    """
+    order = ancestral_order(people)
+    inheritance = inheritance_table()
+    likelihood = trait_table()
+    weighted = {person: [0, 0, 0] for person in people}
+    squared = {person: [0, 0, 0] for person in people}
+    total = total_squared = 0
+    standard_error = None
+
+    n = 0
+    while n < samples:
+        n += 1
+
+        # Sample genes in ancestral order, weighting by the known traits
+        genes = {}
+        weight = 1
+        for person in order:
+            mother = people[person]["mother"]
+            father = people[person]["father"]
+            trait = people[person]["trait"]
+            if not mother and not father:
+                weights = [PROBS["gene"][g] for g in GENES]
+            else:
+                weights = [inheritance[g, genes[mother], genes[father]] for g in GENES]
+            genes[person] = random.choices(GENES, weights=weights)[0]
+            if trait is not None:
+                weight *= likelihood[genes[person], trait]
+
+        total += weight
+        total_squared += weight ** 2
+        for person, g in genes.items():
+            weighted[person][g] += weight
+            squared[person][g] += weight ** 2
+
+        if n % CHECK_EVERY == 0 or n == samples:
+            standard_error = max(
+                weighted_error(weighted[person][g] / total, squared[person][g], total, total_squared)
+                for person in people for g in GENES
+            )
+            if error is not None and standard_error < error:
+                break
+
+    if diagnostics is not None:
+        diagnostics.update({
+            "samples": n,
+            "standard_error": standard_error,
+            "effective_samples": total ** 2 / total_squared,
+        })
+    return {
+        person: person_probabilities(people[person], weighted[person])
+        for person in people
+    }
+
+
+def weighted_error(p, squared, total, total_squared):
+    """
+    Return the standard error of a weighted estimate `p` of a probability,
+    given the sum of squared weights of samples where the event occurred,
+    and the sum and the sum of squares of all weights.
+    """
+    variance = squared * (1 - 2 * p) + p ** 2 * total_squared
+    return max(variance, 0) ** 0.5 / total
+
+
+def gibbs_sampling(people, samples=SAMPLES, error=None, diagnostics=None):
+    """
+    Return approximate gene and trait probabilities for each person by
+    Gibbs sampling over everyone's genes.
+
+    Each sweep resamples every person's gene from its distribution given
+    everyone else's genes and the known traits, after `BURN_IN` sweeps to
+    forget the starting point. The distributions themselves are averaged
+    rather than the sampled genes, which lowers the variance. Sampling stops
+    after `samples` sweeps, or once the largest standard error of any gene
+    probability, estimated from means over batches of `CHECK_EVERY` sweeps,
+    is below `error`. If `diagnostics` is a dictionary, the number of
+    sweeps, burn-in sweeps, batches and the standard error are stored in it.
+    """
+    order = ancestral_order(people)
+    inheritance = inheritance_table()
+    likelihood = trait_table()
+
+    # Pairs of each person's children and their other parent
+    children = {person: [] for person in people}
+    for person in people:
+        mother = people[person]["mother"]
+        father = people[person]["father"]
+        if mother and father:
+            children[mother].append(person)
+            children[father].append(person)
+
+    def conditional(person, genes):
+        mother = people[person]["mother"]
+        father = people[person]["father"]
+        trait = people[person]["trait"]
+        weights = []
+        for g in GENES:
+            if not mother and not father:
+                weight = PROBS["gene"][g]
+            else:
+                weight = inheritance[g, genes[mother], genes[father]]
+            if trait is not None:
+                weight *= likelihood[g, trait]
+            genes[person] = g
+            for child in children[person]:
+                weight *= inheritance[
+                    genes[child],
+                    genes[people[child]["mother"]],
+                    genes[people[child]["father"]]
+                ]
+            weights.append(weight)
+        total = sum(weights)
+        return [weight / total for weight in weights]
+
+    # Start from genes sampled in ancestral order, ignoring the traits
+    genes = {}
+    for person in order:
+        mother = people[person]["mother"]
+        father = people[person]["father"]
+        if not mother and not father:
+            weights = [PROBS["gene"][g] for g in GENES]
+        else:
+            weights = [inheritance[g, genes[mother], genes[father]] for g in GENES]
+        genes[person] = random.choices(GENES, weights=weights)[0]
+
+    for _ in range(BURN_IN):
+        for person in order:
+            genes[person] = random.choices(GENES, weights=conditional(person, genes))[0]
+
+    # Average the conditional distributions over batches of sweeps
+    totals = {person: [0, 0, 0] for person in people}
+    batches = []
+    standard_error = None
+    sweeps = 0
+    while sweeps < samples:
+        batch = {person: [0, 0, 0] for person in people}
+        size = min(CHECK_EVERY, samples - sweeps)
+        for _ in range(size):
+            for person in order:
+                distribution = conditional(person, genes)
+                for g in GENES:
+                    batch[person][g] += distribution[g]
+                genes[person] = random.choices(GENES, weights=distribution)[0]
+        sweeps += size
+        for person in people:
+            for g in GENES:
+                totals[person][g] += batch[person][g]
+        batches.append({
+            person: [value / size for value in batch[person]] for person in people
+        })
+
+        # Standard error of the mean from the spread of the batch means
+        if len(batches) > 1:
+            standard_error = max(
+                batch_error([means[person][g] for means in batches])
+                for person in people for g in GENES
+            )
+            if error is not None and standard_error < error:
+                break
+
+    if diagnostics is not None:
+        diagnostics.update({
+            "samples": sweeps,
+            "burn_in": BURN_IN,
+            "batches": len(batches),
+            "standard_error": standard_error,
+        })
+    return {
+        person: person_probabilities(people[person], totals[person])
+        for person in people
+    }
+
+
+def batch_error(means):
+    """
+    Return the standard error of the mean of a list of batch `means`.
+    """
+    mean = sum(means) / len(means)
+    variance = sum((value - mean) ** 2 for value in means) / (len(means) - 1)
+    return (variance / len(means)) ** 0.5
+
+
+def ancestral_order(people):
+    """
+    Return a list of everyone in `people`, with all parents before their children.
+    """
+    order = []
+    placed = set()
+
+    def place(person):
+        if person in placed:
+            return
+        placed.add(person)
+        for parent in (people[person]["mother"], people[person]["father"]):
+            if parent:
+                place(parent)
+        order.append(person)
+
+    for person in people:
+        place(person)
+    return order
+
+
+METHODS = {
+    "enumerate": enumerate_probabilities,
+    "log-enumerate": log_enumerate_probabilities,
+    "eliminate": eliminate_probabilities,
+    "log": log_eliminate_probabilities,
+    "batch": batch_enumerate_probabilities,
+    "families": family_probabilities,
+    "likelihood": likelihood_weighting,
+    "gibbs": gibbs_sampling,
+}
+
+
 if __name__ == "__main__":
     main()
@@ -1,3 +1,10 @@
+import os
+import shutil
+
+from batch import canonical_family, run_batch
+import benchmark
+from benchmark import generate_pedigree, run_benchmarks, save_pedigree
+from github_test_heredity import predict_family
 from heredity import *
 
 def test_joint_probability():
@@ -9,3 +16,228 @@ def test_joint_probability():
 },
 {"Harry"}, {"James"}, {"James"}
     ) == 0.0026643247488
+
+
+def test_custom_mutation():
+    people = load_data("data/family0.csv")
+    mutation = PROBS["mutation"]
+    try:
+        PROBS["mutation"] = .05
+        assert inheritance_table()[1, 0, 0] == 2 * .05 * .95
+        p = joint_probability(people, {"Harry"}, set(), {"James"})
+        assert abs(p - (2 * .05 * .95) * .44 * .96 * .01 * .96 * .99) < 1e-15
+    finally:
+        PROBS["mutation"] = mutation
+    assert inheritance_table()[1, 0, 0] == 2 * .01 * .99
+
+
+def test_log_space():
+    people = load_data("data/family2.csv")
+    p = joint_probability(people, {"Harry"}, {"James"}, {"James"})
+    assert abs(log_joint_probability(people, {"Harry"}, {"James"}, {"James"}) - math.log(p)) < 1e-12
+    assert_close(log_eliminate_probabilities(people), eliminate_probabilities(people))
+    assert_close(log_enumerate_probabilities(people), enumerate_probabilities(people))
+
+    # Scaling every trait probability by the same tiny factor leaves the gene
+    # distributions unchanged, but underflows ordinary products
+    expected = eliminate_probabilities(people)
+    trait = PROBS["trait"]
+    try:
+        PROBS["trait"] = {g: {t: p * 1e-200 for t, p in trait[g].items()} for g in trait}
+        assert joint_probability(people, {"Harry"}, {"James"}, {"James"}) == 0
+        predictions = [log_eliminate_probabilities(people), log_enumerate_probabilities(people)]
+    finally:
+        PROBS["trait"] = trait
+    for predicted in predictions:
+        for person in people:
+            for g in GENES:
+                assert abs(predicted[person]["gene"][g] - expected[person]["gene"][g]) < 1e-9
+
+
+def test_joint_probabilities():
+    people = load_data("data/family0.csv")
+    genes = [(1, 2, 0), (0, 0, 0), (2, 1, 1)]
+    traits = [(False, True, False), (True, True, False), (False, False, True)]
+    expected = [
+        joint_probability(
+            people,
+            {person for person, g in zip(people, gene) if g == 1},
+            {person for person, g in zip(people, gene) if g == 2},
+            {person for person, t in zip(people, trait) if t}
+        )
+        for gene, trait in zip(genes, traits)
+    ]
+    for p, joint in zip(joint_probabilities(people, genes, traits), expected):
+        assert abs(p - joint) < 1e-15
+
+
+def test_batch_enumerate_probabilities():
+    for n in range(3):
+        people = load_data(f"data/family{n}.csv")
+        assert_close(batch_enumerate_probabilities(people, batch_size=100), predict_family(n))
+
+
+def test_families():
+    people = {}
+    for n in range(3):
+        for person, row in load_data(f"data/family{n}.csv").items():
+            people[f"{person}{n}"] = {
+                "name": f"{person}{n}",
+                "mother": row["mother"] and f"{row['mother']}{n}",
+                "father": row["father"] and f"{row['father']}{n}",
+                "trait": row["trait"],
+            }
+    groups = families(people)
+    assert sorted(len(family) for family in groups) == [3, 5, 6]
+
+    expected = {}
+    for n in range(3):
+        for person, values in predict_family(n).items():
+            expected[f"{person}{n}"] = values
+    assert_close(family_probabilities(people), expected)
+    assert_close(family_probabilities(people, "batch", processes=2), expected)
+    assert list(family_probabilities(people, "eliminate")) == list(people)
+
+
+def test_sampling_probabilities():
+    random.seed(0)
+    people = load_data("data/family2.csv")
+    expected = eliminate_probabilities(people)
+    for method in [likelihood_weighting, gibbs_sampling]:
+        diagnostics = {}
+        predicted = method(people, samples=100000, error=.005, diagnostics=diagnostics)
+        assert diagnostics["standard_error"] < .005
+        assert diagnostics["samples"] < 100000
+        for person in expected:
+            for field in expected[person]:
+                for value in expected[person][field]:
+                    assert abs(predicted[person][field][value] - expected[person][field][value]) < .03
+
+
+def test_canonical_family():
+    people = load_data("data/family1.csv")
+    renamed = {
+        f"x{person}": {
+            "name": f"x{person}",
+            "mother": row["mother"] and f"x{row['mother']}",
+            "father": row["father"] and f"x{row['father']}",
+            "trait": row["trait"],
+        }
+        for person, row in reversed(list(people.items()))
+    }
+    assert canonical_family(people)[0] == canonical_family(renamed)[0]
+
+    # Two couples with a child each differ from one couple with two children
+    founders = {
+        name: {"name": name, "mother": None, "father": None, "trait": None}
+        for name in ["A", "B", "C", "D"]
+    }
+    apart = dict(founders,
+                 X={"name": "X", "mother": "A", "father": "B", "trait": True},
+                 Y={"name": "Y", "mother": "C", "father": "D", "trait": True})
+    together = dict(founders,
+                    X={"name": "X", "mother": "A", "father": "B", "trait": True},
+                    Y={"name": "Y", "mother": "A", "father": "B", "trait": True})
+    assert canonical_family(apart)[0] != canonical_family(together)[0]
+
+
+def test_run_batch(tmp_path):
+    for n in range(3):
+        shutil.copy(f"data/family{n}.csv", tmp_path / f"family{n}.csv")
+    shutil.copy("data/family1.csv", tmp_path / "copy.csv")
+    results = {
+        os.path.basename(result["file"]): result
+        for result in run_batch(sorted(str(path) for path in tmp_path.iterdir()), processes=2)
+    }
+    assert len(results) == 4
+    assert results["copy.csv"]["cached"] != results["family1.csv"]["cached"]
+    for n in range(3):
+        assert_close(results[f"family{n}.csv"]["probabilities"], predict_family(n))
+
+    # Files that fail to load or solve are reported without stopping the batch
+    files = [str(tmp_path / "family0.csv"), str(tmp_path / "missing.csv")]
+    results = list(run_batch(files, method="unknown", processes=2))
+    assert sorted(result["file"] for result in results) == sorted(files)
+    assert all("error" in result for result in results)
+
+
+def test_dense_totals():
+    totals = array("d", bytes(8 * WIDTH * 2))
+    accumulate(totals, 0b01, 0b10, 0b10, .2)
+    accumulate(totals, 0b00, 0b01, 0b11, .6)
+    normalize_totals(totals)
+    assert_close(totals_to_probabilities(["Harry", "James"], totals), {
+        "Harry": {"gene": {2: .75, 1: .25, 0: 0}, "trait": {True: .75, False: .25}},
+        "James": {"gene": {2: .25, 1: 0, 0: .75}, "trait": {True: 1, False: 0}},
+    })
+
+
+def test_benchmark(tmp_path, monkeypatch):
+    rng = random.Random(0)
+    people = generate_pedigree(30, 4, 0.5, rng=rng)
+    assert len(people) == 30
+    assert len(families(people)) == 1
+    for person in people.values():
+        assert (person["mother"] is None) == (person["father"] is None)
+        for parent in (person["mother"], person["father"]):
+            assert parent is None or parent in people
+
+    # Saved pedigrees load back unchanged
+    save_pedigree(people, tmp_path / "pedigree.csv")
+    assert load_data(tmp_path / "pedigree.csv") == people
+
+    results = run_benchmarks(generate_pedigree(6, 2, 0.5, rng=rng), ["enumerate", "eliminate"])
+    assert all(result["max_error"] < 1e-9 for result in results)
+    skipped, = run_benchmarks(people, ["enumerate"])
+    assert "skipped" in skipped
+
+    # Branches of a deep connected pedigree marry back into each other, but
+    # stay narrow enough to solve exactly
+    people = generate_pedigree(200, 6, 0.5, 0.3, rng=rng)
+    assert len(families(people)) == 1
+    depth = {}
+    for name, person in people.items():
+        depth[name] = 0 if person["mother"] is None else depth[person["mother"]] + 1
+    assert max(depth.values()) >= 4
+    scopes = [variables for variables, _ in gene_factors(people)]
+    assert 2 < induced_width(scopes, min_fill_order(scopes)) <= benchmark.WIDTH_LIMIT
+
+    # Without a feasible exact reference, errors are not reported
+    monkeypatch.setattr(benchmark, "WIDTH_LIMIT", 0)
+    skipped, enumerated = run_benchmarks(load_data("data/family0.csv"), ["log", "enumerate"])
+    assert "skipped" in skipped
+    assert enumerated["max_error"] is None
+
+
+def test_members():
+    assert members(["Harry", "James", "Lily"], 0b101) == {"Harry", "Lily"}
+    assert members(["Harry", "James", "Lily"], 0) == set()
+
+
+def test_enumerate_probabilities():
+    for n in range(3):
+        people = load_data(f"data/family{n}.csv")
+        assert_close(enumerate_probabilities(people), predict_family(n))
+
+
+def test_eliminate_probabilities():
+    for n in range(3):
+        people = load_data(f"data/family{n}.csv")
+        expected = enumerate_probabilities(people)
+        assert_close(eliminate_probabilities(people), expected)
+
+    # Two unrelated families with no links between them
+    people = {
+        "A": {"name": "A", "mother": None, "father": None, "trait": True},
+        "B": {"name": "B", "mother": None, "father": None, "trait": None},
+        "C": {"name": "C", "mother": "A", "father": "B", "trait": None},
+        "D": {"name": "D", "mother": None, "father": None, "trait": False},
+    }
+    assert_close(eliminate_probabilities(people), enumerate_probabilities(people))
+
+
+def assert_close(predicted, expected):
+    for person in expected:
+        for field in expected[person]:
+            for value in expected[person][field]:
+                assert abs(predicted[person][field][value] - expected[person][field][value]) < 1e-9
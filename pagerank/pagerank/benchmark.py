@@ -0,0 +1,136 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from pagerank import (DAMPING, SAMPLES, batch_sample_pagerank, crawl,
+                      iterate_pagerank, sample_pagerank, sparse_pagerank)
+
+SIZES = [100, 1000, 10000]
+DISTRIBUTIONS = ["uniform", "power-law"]
+MEAN_DEGREE = 8
+DANGLING = 0.1
+REFERENCE_TOLERANCE = 1e-12
+
+BENCHMARKS = {
+    "crawl": lambda directory, corpus: crawl(directory),
+    "sample_pagerank": lambda directory, corpus: sample_pagerank(corpus, DAMPING, SAMPLES),
+    "batch_sample_pagerank": lambda directory, corpus: batch_sample_pagerank(corpus, DAMPING, SAMPLES),
+    "iterate_pagerank": lambda directory, corpus: iterate_pagerank(corpus, DAMPING),
+    "sparse_pagerank": lambda directory, corpus: sparse_pagerank(corpus, DAMPING),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pagerank.py on synthetic corpora.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--distributions", nargs="+", choices=DISTRIBUTIONS, default=DISTRIBUTIONS)
+    parser.add_argument("--degree", type=int, default=MEAN_DEGREE, help="mean number of links per page")
+    parser.add_argument("--dangling", type=float, default=DANGLING, help="fraction of pages without links")
+    parser.add_argument("--functions", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", help="file to append JSON lines to (default: standard output)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    output = open(args.output, "a") if args.output else sys.stdout
+    try:
+        for distribution in args.distributions:
+            for size in args.sizes:
+                for result in run_benchmarks(size, distribution, args.degree, args.dangling, args.functions, rng):
+                    print(json.dumps(result), file=output, flush=True)
+    finally:
+        if args.output:
+            output.close()
+
+
+def generate_corpus(directory, size, distribution="uniform", degree=MEAN_DEGREE,
+                    dangling=DANGLING, rng=random):
+    """
+    Write a synthetic corpus of `size` HTML pages to `directory`.
+
+    A `dangling` fraction of pages have no links. Every other page has about
+    `degree` links: with the "uniform" distribution, the number of links and
+    their targets are chosen uniformly, and with the "power-law" distribution
+    the number of links follows a Pareto distribution and targets are chosen
+    with Zipf weights, so a few pages collect most of the links.
+    Return the corpus as a dictionary in the form returned by `crawl`.
+    """
+    pages = [f"{i}.html" for i in range(size)]
+    if distribution == "power-law":
+        weights = [1 / (rank + 1) for rank in range(size)]
+        rng.shuffle(weights)
+    elif distribution != "uniform":
+        raise ValueError(f"unknown distribution {distribution!r}")
+
+    corpus = {}
+    for page in pages:
+        if rng.random() < dangling:
+            count = 0
+        elif distribution == "uniform":
+            count = rng.randint(1, 2 * degree - 1)
+        else:
+            count = int(rng.paretovariate(2) * degree / 2)
+        count = min(count, size - 1)
+        if distribution == "uniform":
+            links = set(rng.sample(pages, count))
+        else:
+            links = set(rng.choices(pages, weights=weights, k=count))
+        corpus[page] = links - {page}
+
+        with open(os.path.join(directory, page), "w") as f:
+            f.write(f"<!DOCTYPE html>\n<html>\n<head>\n<title>{page}</title>\n</head>\n<body>\n")
+            for link in sorted(corpus[page]):
+                f.write(f'<a href="{link}">{link}</a>\n')
+            f.write("</body>\n</html>\n")
+
+    return corpus
+
+
+def run_benchmarks(size, distribution, degree, dangling, functions, rng=random):
+    """
+    Generate a synthetic corpus and benchmark each of `functions` on it.
+
+    Each function runs twice: once for wall time, and once under tracemalloc
+    for peak memory, so tracing does not distort the timing. Return a list
+    of result dictionaries; PageRank results also record the largest error
+    against a tightly converged reference solution.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        corpus = generate_corpus(directory, size, distribution, degree, dangling, rng)
+        reference = sparse_pagerank(corpus, DAMPING, tolerance=REFERENCE_TOLERANCE)
+
+        for name in functions:
+            benchmark = BENCHMARKS[name]
+            start = time.perf_counter()
+            result = benchmark(directory, corpus)
+            seconds = time.perf_counter() - start
+
+            tracemalloc.start()
+            benchmark(directory, corpus)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            error = None
+            if name != "crawl":
+                error = max(abs(result[page] - reference[page]) for page in reference)
+            results.append({
+                "function": name,
+                "distribution": distribution,
+                "pages": size,
+                "links": sum(len(links) for links in corpus.values()),
+                "dangling": dangling,
+                "seconds": seconds,
+                "peak_bytes": peak,
+                "max_error": error,
+            })
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,25 @@
+import json
+import mmap
 import os
 import random
 import re
+import shutil
 import sys
+import tempfile
+from array import array
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
 
 DAMPING = 0.85
 SAMPLES = 10000
+SURFERS = 1000
+TOLERANCE = 1e-8
+MAX_ITERATIONS = 1000
+EXTRAPOLATION_PERIOD = 10
+CHUNK_SIZE = 1 << 16
+CACHE_FILENAME = ".pagerank-cache"
+EDGE_CHUNK = 1 << 16
+LINK_PATTERN = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
 
 
 def main():
@@ -21,11 +36,84 @@ def main():
         print(f"  {page}: {ranks[page]:.4f}")
 
 
+class LinkGraph(Mapping):
+    """
+    Link graph of a corpus, with page names interned to integer IDs.
+
+    The pages linked to by page i are `targets[offsets[i]:offsets[i + 1]]`,
+    and `out_degree[i]` is the number of links on page i. The graph can also
+    be used as a read-only dictionary where each key is a page, and values
+    are the set of pages linked to by the page.
+    """
+
+    def __init__(self, pages, offsets, targets):
+        """Create a new link graph from page names and int32 link arrays."""
+        self.pages = list(pages)
+        self.index = {page: i for i, page in enumerate(self.pages)}
+        self.offsets = offsets
+        self.targets = targets
+        self.out_degree = array("i", (
+            offsets[i + 1] - offsets[i] for i in range(len(self.pages))
+        ))
+        self._inbound = None
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Return the link graph of a dictionary mapping pages to sets of
+        linked pages. Links to pages outside the corpus are ignored.
+        """
+        if isinstance(corpus, cls):
+            return corpus
+        pages = list(corpus)
+        index = {page: i for i, page in enumerate(pages)}
+        offsets = array("i", [0])
+        targets = array("i")
+        for page in pages:
+            targets.extend(index[link] for link in corpus[page] if link in index)
+            offsets.append(len(targets))
+        return cls(pages, offsets, targets)
+
+    def inbound(self):
+        """
+        Return a tuple (offsets, sources) where the pages that link to
+        page i are `sources[offsets[i]:offsets[i + 1]]`.
+        """
+        if self._inbound is None:
+            inbound = [[] for _ in self.pages]
+            for i in range(len(self.pages)):
+                for target in self.targets[self.offsets[i]:self.offsets[i + 1]]:
+                    inbound[target].append(i)
+            offsets = array("i", [0])
+            sources = array("i")
+            for links in inbound:
+                sources.extend(links)
+                offsets.append(len(sources))
+            self._inbound = offsets, sources
+        return self._inbound
+
+    def __getitem__(self, page):
+        i = self.index[page]
+        return set(
+            self.pages[target]
+            for target in self.targets[self.offsets[i]:self.offsets[i + 1]]
+        )
+
+    def __iter__(self):
+        return iter(self.pages)
+
+    def __len__(self):
+        return len(self.pages)
+
+    def __contains__(self, page):
+        return page in self.index
+
+
 def crawl(directory):
     """
     Parse a directory of HTML pages and check for links to other pages.
-    Return a dictionary where each key is a page, and values are
-    a list of all other pages in the corpus that are linked to by the page.
+    Return a `LinkGraph`, which maps each page to the set of all other
+    pages in the corpus that are linked to by the page.
     """
     pages = dict()
 
@@ -45,7 +133,165 @@ def crawl(directory):
             if link in pages
         )
 
-    return pages
+    return LinkGraph.from_corpus(pages)
+
+
+def parallel_crawl(directory, cache=None, processes=None):
+    """
+    Parse a directory of HTML pages like `crawl`, spreading the parsing of
+    files over a pool of `processes` worker processes.
+
+    The links found in each file are saved to the link-graph cache file
+    `cache` (by default `CACHE_FILENAME` inside `directory`), keyed by file
+    modification time and size, so only files that changed since the last
+    run are parsed again. If `cache` is False, nothing is cached, and if the
+    cache cannot be written the crawl still succeeds. Return the same
+    dictionary as `crawl`.
+    """
+    if cache is None:
+        cache = os.path.join(directory, CACHE_FILENAME)
+
+    # Find every HTML file along with its modification time and size
+    files = {}
+    for filename in os.listdir(directory):
+        if not filename.endswith(".html"):
+            continue
+        stat = os.stat(os.path.join(directory, filename))
+        files[filename] = (stat.st_mtime_ns, stat.st_size)
+
+    # Reuse the links of files that are unchanged since they were cached
+    cached = load_link_cache(cache) if cache is not False else {}
+    links = {
+        filename: cached[filename][1]
+        for filename in files
+        if filename in cached and cached[filename][0] == files[filename]
+    }
+
+    # Parse the remaining files, in parallel if there is more than one
+    changed = [filename for filename in files if filename not in links]
+    paths = [os.path.join(directory, filename) for filename in changed]
+    if len(paths) > 1 and processes != 1:
+        with ProcessPoolExecutor(processes) as executor:
+            parsed = list(executor.map(parse_links, paths))
+    else:
+        parsed = [parse_links(path) for path in paths]
+    links.update(zip(changed, parsed))
+
+    # The cache only saves work, so a directory it cannot be written to is not an error
+    if cache is not False and (changed or set(cached) != set(files)):
+        try:
+            save_link_cache(cache, {
+                filename: (files[filename], links[filename]) for filename in files
+            })
+        except OSError:
+            pass
+
+    # Only include links to other pages in the corpus
+    return LinkGraph.from_corpus({
+        filename: set(
+            link for link in links[filename]
+            if link in files and link != filename
+        )
+        for filename in files
+    })
+
+
+def parse_links(path):
+    """
+    Return the set of all link targets in the HTML file at `path`.
+
+    The file is read in chunks of `CHUNK_SIZE` characters, carrying any
+    unfinished tag at the end of a chunk over into the next one.
+    """
+    links = set()
+    tail = ""
+    with open(path) as f:
+        while chunk := f.read(CHUNK_SIZE):
+            contents = tail + chunk
+            end = 0
+            for match in LINK_PATTERN.finditer(contents):
+                links.add(match.group(1))
+                end = match.end()
+            start = contents.rfind("<", end)
+            tail = contents[start:] if start != -1 else ""
+    return links
+
+
+def load_link_cache(cache):
+    """
+    Load a link-graph cache file written by `save_link_cache`.
+
+    Return a dictionary where each key is a filename, and values are a tuple
+    (key, links) of the file's (modification time, size) and its set of link
+    targets. Return an empty dictionary if there is no readable cache.
+    """
+    try:
+        with open(cache, "rb") as f:
+            header = json.loads(f.readline())
+            files = header["files"]
+            names = header["names"]
+            offsets = array("i")
+            offsets.frombytes(f.read(offsets.itemsize * (len(files) + 1)))
+            if len(offsets) != len(files) + 1:
+                return {}
+            targets = array("i")
+            targets.frombytes(f.read(targets.itemsize * offsets[-1]))
+            if len(targets) != offsets[-1]:
+                return {}
+
+            # A truncated or garbled cache is treated as no cache, so every file is parsed again
+            return {
+                names[name]: (
+                    (mtime, size),
+                    set(names[target] for target in targets[offsets[i]:offsets[i + 1]])
+                )
+                for i, (name, mtime, size) in enumerate(files)
+            }
+    except (OSError, ValueError, KeyError, IndexError, TypeError):
+        return {}
+
+
+def save_link_cache(cache, entries):
+    """
+    Write `entries`, in the form returned by `load_link_cache`, to the
+    link-graph cache file `cache`.
+
+    Every filename and link target is stored once in a JSON header and
+    replaced with an integer ID, and the links of each file are stored as
+    int32 offset and target arrays after the header. The file is written
+    under a temporary name and then moved into place, so readers never see
+    a partly written cache.
+    """
+    names = []
+    ids = {}
+
+    def intern(name):
+        if name not in ids:
+            ids[name] = len(names)
+            names.append(name)
+        return ids[name]
+
+    files = []
+    offsets = array("i", [0])
+    targets = array("i")
+    for filename, ((mtime, size), links) in entries.items():
+        files.append([intern(filename), mtime, size])
+        targets.extend(intern(link) for link in links)
+        offsets.append(len(targets))
+
+    fd, temporary = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(cache)),
+        prefix=os.path.basename(cache) + "."
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(json.dumps({"names": names, "files": files}).encode() + b"\n")
+            f.write(offsets.tobytes())
+            f.write(targets.tobytes())
+        os.replace(temporary, cache)
+    except BaseException:
+        os.unlink(temporary)
+        raise
 
 
 def transition_model(corpus, page, damping_factor):
@@ -99,99 +345,605 @@ def sample_pagerank(corpus, damping_factor, n):
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    # Create variables to keep track of counts for each link and pages
-    link_count = {}
-    pages = []
-    # append all the pages and set all the counts to 0
-    for page in corpus:
-        pages.append(page)
-        link_count[page] = 0
+    graph = LinkGraph.from_corpus(corpus)
+    size = len(graph)
+    link_count = [0] * size
+
     # Choose one page from the corpus at random with equal probability
-    starting_page = random.choice(pages)
-
-    # From each page, based on the transition model, assign new weights to each page
-    # Choose a new page based on these new weights, and add a count for the page we started on
-    # Reassign "starting_page" to the new page we chose, and repeat the process for as many times as there are samples
-    i = 0
-    while i < n-1:
-        link_count[starting_page] += 1
-        new_model = transition_model(corpus, starting_page, damping_factor)
-        pages = []
-        page_weights = []
-        for page in new_model:
-            pages.append(page)
-            page_weights.append(new_model[page])
-        starting_page = random.choices(pages, weights=page_weights, k=1)[0]
-        i += 1
+    page = random.randrange(size)
+
+    # Add a count for the page we are on, then move to the next page as in the transition model:
+    # With probability `damping_factor` follow one of the page's links, otherwise
+    # (or if the page has no links) choose any page in the corpus at random
+    for _ in range(n):
+        link_count[page] += 1
+        start, end = graph.offsets[page], graph.offsets[page + 1]
+        if start < end and random.random() < damping_factor:
+            page = graph.targets[random.randrange(start, end)]
+        else:
+            page = random.randrange(size)
+
     # Find the percentage variable of each page count by dividing each count by the total # of samples
-    for page in link_count:
-        link_count[page] /= n
+    return {page: count / n for page, count in zip(graph.pages, link_count)}
+
+
+def batch_sample_pagerank(corpus, damping_factor, n, surfers=SURFERS):
+    """
+    Return PageRank values for each page by sampling about `n` pages with
+    terminating random walks, advancing up to `surfers` walks together.
+
+    Each walk starts on a page at random and, after each page it visits,
+    stops with probability `1 - damping_factor`; otherwise it follows one
+    of the page's links (or jumps to any page if it has none). Every walk
+    runs to the end, so the visit counts weight each step exactly as
+    PageRank does, with no bias from where walks start. `damping_factor`
+    must be below 1. Return a dictionary where keys are page names, and
+    values are their estimated PageRank value. All PageRank values should
+    sum to 1.
+    """
+    if not 0 <= damping_factor < 1:
+        raise ValueError("damping_factor must be at least 0 and below 1")
+    graph = LinkGraph.from_corpus(corpus)
+    offsets, targets = graph.offsets, graph.targets
+    size = len(graph)
+    counts = [0] * size
+
+    # Walks last 1 / (1 - damping_factor) pages on average, so this many walks sample about n pages
+    walks = max(1, round(n * (1 - damping_factor)))
+    positions = [random.randrange(size) for _ in range(min(surfers, walks))]
+    started = len(positions)
+
+    # Count the page each surfer is on, then move all surfers one step
+    # A surfer whose walk stops starts a new walk on a page at random until every walk has started
+    while positions:
+        moves = []
+        for page in positions:
+            counts[page] += 1
+            draw = random.random()
+            if draw < damping_factor:
+                start, end = offsets[page], offsets[page + 1]
+                if start < end:
+                    moves.append(targets[start + int(draw / damping_factor * (end - start))])
+                else:
+                    moves.append(random.randrange(size))
+            elif started < walks:
+                started += 1
+                moves.append(random.randrange(size))
+        positions = moves
+
+    total = sum(counts)
+    return {page: count / total for page, count in zip(graph.pages, counts)}
 
-    return link_count
-    
 
 def iterate_pagerank(corpus, damping_factor):
     """
     Return PageRank values for each page by iteratively updating
-    PageRank values until convergence.
+    PageRank values until convergence. `corpus` is not modified, so it
+    can be shared with other runs.
 
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    # Assign variables to keep track of all the pages, the ranks, a comparable ranks (for detecting the change),
-    # and the number of links for each page
-    pages = []
-    page_ranks = {}
-    compared_page_ranks = {}
-    num_links = {}
-    
-    # Assign starting values to variable above based on the assumption that all page ranks are chosen equally
-    for page in corpus:
-        page_ranks[page] = 1/len(corpus)
-        compared_page_ranks[page] = 1/len(corpus)
-        pages.append(page)
-        if corpus[page] == set():
-            for paged in corpus:
-                corpus[page].add(paged)
-        num_links[page] = len(corpus[page])
-
-    # While there is no change between page_ranks and compared_page_ranks greater than 1/1000th,
-    # Repeat the following:
-    """
-    Determind the probability that you would land on the current page from any other given page 
-    based on the page ranks and whether the current page is being linked to
-    Do this for every page to find new page rank values and assign them to 
-    compared_page_rank - this what we compare to check the change from the previous version
-    if it converged by 1/1000ths, we return the value
+    graph = LinkGraph.from_corpus(corpus)
+    n = len(graph)
+    num_links = graph.out_degree
+    offsets, sources = graph.inbound()
+
+    # Assign starting values based on the assumption that all page ranks are chosen equally
+    page_ranks = [1 / n] * n
+
+    """
+    Determine the probability that you would land on each page from any other given page
+    based on the page ranks of the pages linking to it. Pages without links are treated as
+    linking to every page, so their rank is spread evenly over the corpus without adding
+    any links to it. Repeat until no rank changes in its first six decimal places.
     """
     while True:
-        # Set new page rank values
-        for page in pages:
-            page_links = [linked for linked in corpus if page in corpus[linked]]
-
-            sum_link_prob = 0
-            for link in page_links:
-                
-                prob_from_link = page_ranks[link]/num_links[link]
-                sum_link_prob += prob_from_link
-                
-            compared_page_ranks[page] = (1-damping_factor)/len(corpus) + (damping_factor * sum_link_prob)
-
-        # If it did not converge, set to False  
-        changed = True
-        for page in page_ranks:
-            if format(page_ranks[page], ".6f") != format(compared_page_ranks[page], ".6f"):
-                changed = False
-
-        # If it coverged, return the value
-        if changed:
-            return compared_page_ranks
-        # Otherwise, set page ranks equal
+        dangling = sum(rank for rank, links in zip(page_ranks, num_links) if not links)
+        compared_page_ranks = [
+            (1 - damping_factor) / n + damping_factor * (dangling / n + sum(
+                page_ranks[link] / num_links[link]
+                for link in sources[offsets[page]:offsets[page + 1]]
+            ))
+            for page in range(n)
+        ]
+
+        # If it coverged, return the value, otherwise set page ranks equal
+        if all(
+            format(old, ".6f") == format(new, ".6f")
+            for old, new in zip(page_ranks, compared_page_ranks)
+        ):
+            return dict(zip(graph.pages, compared_page_ranks))
+        page_ranks = compared_page_ranks
+
+
+def power_iterate(graph, damping_factor, ranks, tolerance=TOLERANCE,
+                  max_iterations=MAX_ITERATIONS):
+    """
+    Run power iteration over the inbound links of a `LinkGraph`, starting
+    from the list `ranks` of PageRank values by page ID.
+
+    The rank of pages without links is spread evenly over every page as a
+    rank-1 correction rather than as explicit links. Iteration stops once the
+    L1 change between sweeps is below `tolerance`, or after `max_iterations`
+    sweeps. Return a tuple (ranks, iterations).
+    """
+    n = len(graph)
+    out_degree = graph.out_degree
+    offsets, sources = graph.inbound()
+    teleport = (1 - damping_factor) / n
+    iterations = 0
+    while iterations < max_iterations:
+        iterations += 1
+
+        # Share of each page's rank passed along each of its links
+        contributions = [
+            rank / degree if degree else 0
+            for rank, degree in zip(ranks, out_degree)
+        ]
+        dangling = sum(
+            rank for rank, degree in zip(ranks, out_degree) if not degree
+        )
+        base = teleport + damping_factor * dangling / n
+
+        new_ranks = [
+            base + damping_factor * sum(
+                contributions[source]
+                for source in sources[offsets[i]:offsets[i + 1]]
+            )
+            for i in range(n)
+        ]
+
+        change = sum(abs(new - old) for new, old in zip(new_ranks, ranks))
+        ranks = new_ranks
+        if change < tolerance:
+            break
+
+    return ranks, iterations
+
+
+def gauss_seidel_iterate(graph, damping_factor, ranks, tolerance=TOLERANCE,
+                         max_iterations=MAX_ITERATIONS):
+    """
+    Run Gauss-Seidel sweeps over the inbound links of a `LinkGraph`,
+    starting from the list `ranks` of PageRank values by page ID.
+
+    Unlike `power_iterate`, each page's new rank is used by the pages after
+    it in the same sweep, which usually converges in fewer sweeps. Ranks are
+    renormalized to sum to 1 after every sweep, since a sweep does not keep
+    their total and its error would otherwise only decay by
+    `damping_factor` per sweep. Return a tuple (ranks, iterations).
+    """
+    n = len(graph)
+    out_degree = graph.out_degree
+    offsets, sources = graph.inbound()
+    teleport = (1 - damping_factor) / n
+    ranks = list(ranks)
+    dangling = sum(rank for rank, degree in zip(ranks, out_degree) if not degree)
+    iterations = 0
+    while iterations < max_iterations:
+        iterations += 1
+        previous = ranks[:]
+        for i in range(n):
+            new = teleport + damping_factor * (dangling / n + sum(
+                ranks[source] / out_degree[source]
+                for source in sources[offsets[i]:offsets[i + 1]]
+            ))
+            if not out_degree[i]:
+                dangling += new - ranks[i]
+            ranks[i] = new
+
+        total = sum(ranks)
+        ranks = [rank / total for rank in ranks]
+        dangling /= total
+        change = sum(abs(new - old) for new, old in zip(ranks, previous))
+        if change < tolerance:
+            break
+
+    return ranks, iterations
+
+
+def aitken_iterate(graph, damping_factor, ranks, tolerance=TOLERANCE,
+                   max_iterations=MAX_ITERATIONS):
+    """
+    Run power iteration with Aitken extrapolation over the inbound links of
+    a `LinkGraph`, starting from the list `ranks` of PageRank values by page ID.
+
+    Every `EXTRAPOLATION_PERIOD` sweeps, the last three iterates of each page
+    are extrapolated to their limit with Aitken's delta-squared process,
+    which cancels the slowest-decaying error term. Return a tuple
+    (ranks, iterations).
+    """
+    history = [ranks]
+    iterations = 0
+    while iterations < max_iterations:
+        iterations += 1
+        new_ranks, _ = power_iterate(graph, damping_factor, ranks, max_iterations=1)
+        change = sum(abs(new - old) for new, old in zip(new_ranks, ranks))
+        ranks = new_ranks
+        if change < tolerance:
+            break
+
+        history = history[-2:] + [ranks]
+        if iterations % EXTRAPOLATION_PERIOD or len(history) < 3:
+            continue
+        extrapolated = []
+        for first, second, third in zip(*history):
+            denominator = third - 2 * second + first
+            if denominator:
+                extrapolated.append(third - (third - second) ** 2 / denominator)
+            else:
+                extrapolated.append(third)
+
+        # Keep the plain iterate if extrapolation overshoots below zero
+        if min(extrapolated) > 0:
+            total = sum(extrapolated)
+            ranks = [rank / total for rank in extrapolated]
+            history = [ranks]
+
+    return ranks, iterations
+
+
+def adaptive_iterate(graph, damping_factor, ranks, tolerance=TOLERANCE,
+                     max_iterations=MAX_ITERATIONS):
+    """
+    Run adaptive power iteration over the inbound links of a `LinkGraph`,
+    starting from the list `ranks` of PageRank values by page ID.
+
+    A page whose rank changes by less than `tolerance / N` in a sweep is
+    frozen and not recomputed in later sweeps, so each sweep only updates
+    pages that are still converging. Once the remaining pages settle, a
+    full sweep over every page confirms convergence or unfreezes the pages
+    that moved again. Ranks are renormalized to sum to 1 after every sweep.
+    Return a tuple (ranks, iterations).
+    """
+    n = len(graph)
+    out_degree = graph.out_degree
+    offsets, sources = graph.inbound()
+    teleport = (1 - damping_factor) / n
+    ranks = list(ranks)
+    active = range(n)
+    full = True
+    iterations = 0
+    while iterations < max_iterations:
+        iterations += 1
+        dangling = sum(rank for rank, degree in zip(ranks, out_degree) if not degree)
+        base = teleport + damping_factor * dangling / n
+        updates = [
+            (i, base + damping_factor * sum(
+                ranks[source] / out_degree[source]
+                for source in sources[offsets[i]:offsets[i + 1]]
+            ))
+            for i in active
+        ]
+
+        previous = [ranks[i] for i, _ in updates]
+        for i, new in updates:
+            ranks[i] = new
+        total = sum(ranks)
+        ranks = [rank / total for rank in ranks]
+
+        change = 0
+        active = []
+        for (i, _), old in zip(updates, previous):
+            delta = abs(ranks[i] - old)
+            change += delta
+            if delta >= tolerance / n:
+                active.append(i)
+
+        # Only a full sweep can show that every page has converged
+        if change < tolerance and full:
+            break
+        full = not active or change < tolerance
+        if full:
+            active = range(n)
+
+    return ranks, iterations
+
+
+SOLVERS = {
+    "power": power_iterate,
+    "gauss-seidel": gauss_seidel_iterate,
+    "aitken": aitken_iterate,
+    "adaptive": adaptive_iterate,
+}
+
+
+def sparse_pagerank(corpus, damping_factor, tolerance=TOLERANCE,
+                    max_iterations=MAX_ITERATIONS):
+    """
+    Return PageRank values for each page by power iteration over the
+    sparse link graph of `corpus`.
+
+    Iteration stops when the L1 change between sweeps falls below
+    `tolerance`, or after `max_iterations` sweeps. Return a dictionary
+    where keys are page names, and values are their PageRank value. All
+    PageRank values should sum to 1.
+    """
+    if not corpus:
+        return {}
+    graph = LinkGraph.from_corpus(corpus)
+    ranks = [1 / len(graph)] * len(graph)
+    ranks, _ = power_iterate(graph, damping_factor, ranks, tolerance, max_iterations)
+    return dict(zip(graph.pages, ranks))
+
+
+def solve_pagerank(corpus, damping_factor, solver="power",
+                   tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Return PageRank values for each page using one of the iterative
+    `SOLVERS`, starting with all page ranks equal.
+
+    Return a tuple (ranks, iterations) of a dictionary where keys are page
+    names, and values are their PageRank value, and the number of sweeps
+    the solver took to reach `tolerance`.
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"unknown solver {solver!r}, expected one of {', '.join(SOLVERS)}")
+    if not corpus:
+        return {}, 0
+    graph = LinkGraph.from_corpus(corpus)
+    ranks = [1 / len(graph)] * len(graph)
+    ranks, iterations = SOLVERS[solver](
+        graph, damping_factor, ranks, tolerance, max_iterations
+    )
+    return dict(zip(graph.pages, ranks)), iterations
+
+
+def personalized_pagerank(corpus, damping_factor, personalizations,
+                          tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Return topic-sensitive PageRank values for many personalization vectors
+    at once.
+
+    `personalizations` maps each topic to either a set of seed pages, which
+    are weighted equally, or a dictionary of page weights. With probability
+    `1 - damping_factor`, and from pages without links, the surfer jumps to
+    a page chosen by the topic's weights rather than from all pages. All
+    topics are solved together as one N x K block iteration, so each pass
+    over the links is shared between topics. Return a dictionary where keys
+    are topics, and values are dictionaries of PageRank values by page.
+    """
+    graph = LinkGraph.from_corpus(corpus)
+    topics = list(personalizations)
+    n = len(graph)
+
+    # Teleport distribution of every topic, as one row of K weights per page
+    teleport = [[0.0] * len(topics) for _ in range(n)]
+    for k, topic in enumerate(topics):
+        weights = personalizations[topic]
+        if not isinstance(weights, Mapping):
+            weights = dict.fromkeys(weights, 1)
+        total = sum(weight for page, weight in weights.items() if page in graph)
+        if total <= 0:
+            raise ValueError(f"personalization for {topic!r} has no pages in the corpus")
+        for page, weight in weights.items():
+            if page in graph:
+                teleport[graph.index[page]][k] = weight / total
+
+    out_degree = graph.out_degree
+    offsets, sources = graph.inbound()
+    ranks = [row[:] for row in teleport]
+    for _ in range(max_iterations):
+
+        # Share of each page's ranks passed along each of its links, and the
+        # rank of pages without links that jumps like a teleport
+        contributions = [
+            [rank / degree for rank in row] if degree else None
+            for row, degree in zip(ranks, out_degree)
+        ]
+        dangling = [
+            sum(column) for column in zip(*(
+                row for row, degree in zip(ranks, out_degree) if not degree
+            ))
+        ] or [0.0] * len(topics)
+        jump = [1 - damping_factor + damping_factor * mass for mass in dangling]
+
+        new_ranks = []
+        for i in range(n):
+            linked = [
+                sum(column) for column in zip(*(
+                    contributions[source]
+                    for source in sources[offsets[i]:offsets[i + 1]]
+                ))
+            ] or [0.0] * len(topics)
+            new_ranks.append([
+                scale * weight + damping_factor * rank
+                for scale, weight, rank in zip(jump, teleport[i], linked)
+            ])
+
+        change = max(
+            sum(abs(new - old) for new, old in zip(*columns))
+            for columns in zip(zip(*new_ranks), zip(*ranks))
+        ) if topics else 0
+        ranks = new_ranks
+        if change < tolerance:
+            break
+
+    return {
+        topic: {page: ranks[i][k] for i, page in enumerate(graph.pages)}
+        for k, topic in enumerate(topics)
+    }
+
+
+def save_edge_file(graph, path):
+    """
+    Write the links of a `LinkGraph` to the binary edge file `path`.
+
+    The file starts with a JSON header line holding the page names, padded
+    to a multiple of 8 bytes, followed by the int32 out-degree of every page
+    and then every link as an int32 (source, target) pair.
+    """
+    graph = LinkGraph.from_corpus(graph)
+    with open(path, "wb") as f:
+        f.write(edge_file_header(graph.pages, len(graph.targets)))
+        f.write(graph.out_degree.tobytes())
+        for i in range(len(graph)):
+            edges = array("i")
+            for target in graph.targets[graph.offsets[i]:graph.offsets[i + 1]]:
+                edges.extend((i, target))
+            f.write(edges.tobytes())
+
+
+def crawl_edge_file(directory, path, processes=None):
+    """
+    Parse a directory of HTML pages like `crawl`, writing the links straight
+    to the binary edge file `path` in the format of `save_edge_file`.
+
+    Page names are interned to IDs up front, and each file's links are
+    appended to a temporary edge list as int32 pairs as soon as the file is
+    parsed, so only the page names and out-degrees are held in memory.
+    Files are parsed in a pool of `processes` worker processes, unless
+    `processes` is 1. Return the number of links written.
+    """
+    pages = [filename for filename in os.listdir(directory) if filename.endswith(".html")]
+    index = {page: i for i, page in enumerate(pages)}
+    out_degree = array("i", [0]) * len(pages)
+    paths = [os.path.join(directory, page) for page in pages]
+
+    with tempfile.TemporaryFile() as edges:
+        def append(i, links):
+
+            # Only include links to other pages in the corpus
+            targets = sorted(index[link] for link in links if link in index and link != pages[i])
+            out_degree[i] = len(targets)
+            pairs = array("i")
+            for target in targets:
+                pairs.extend((i, target))
+            edges.write(pairs.tobytes())
+
+        if len(paths) > 1 and processes != 1:
+            with ProcessPoolExecutor(processes) as executor:
+                for i, links in enumerate(executor.map(parse_links, paths, chunksize=64)):
+                    append(i, links)
         else:
-            for page in page_ranks:
-                page_ranks[page] = compared_page_ranks[page]
+            for i, page_path in enumerate(paths):
+                append(i, parse_links(page_path))
+
+        count = sum(out_degree)
+        edges.seek(0)
+        with open(path, "wb") as f:
+            f.write(edge_file_header(pages, count))
+            f.write(out_degree.tobytes())
+            shutil.copyfileobj(edges, f)
+    return count
+
+
+def edge_file_header(pages, edges):
+    """
+    Return the JSON header line of an edge file with page names `pages` and
+    `edges` links, padded so the arrays after it start on an 8-byte boundary.
+    """
+    header = json.dumps({"pages": pages, "edges": edges}).encode()
+    return header + b" " * (-(len(header) + 1) % 8) + b"\n"
+
+
+def stream_pagerank(path, damping_factor, tolerance=TOLERANCE,
+                    max_iterations=MAX_ITERATIONS, chunk=EDGE_CHUNK):
+    """
+    Return PageRank values for each page in the edge file `path`, written by
+    `save_edge_file`, by power iteration that streams over the file.
+
+    The edge list is memory-mapped and each sweep passes over it `chunk`
+    edges at a time, so only the out-degrees and two rank vectors are held
+    in memory. Return a dictionary where keys are page names, and values are
+    their PageRank value. All PageRank values should sum to 1.
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        header = json.loads(data.readline())
+        pages = header["pages"]
+        n = len(pages)
+        if not n:
+            return {}
+        start = data.tell()
+        view = memoryview(data)
+        out_degree = view[start:start + 4 * n].cast("i")
+        edges = view[start + 4 * n:start + 4 * n + 8 * header["edges"]].cast("i")
+
+        try:
+            teleport = (1 - damping_factor) / n
+            ranks = array("d", [1 / n]) * n
+            for _ in range(max_iterations):
+                dangling = sum(rank for rank, degree in zip(ranks, out_degree) if not degree)
+                new_ranks = array("d", [teleport + damping_factor * dangling / n]) * n
+
+                # Pass each source page's share of rank along its links, one chunk at a time
+                for offset in range(0, len(edges), 2 * chunk):
+                    block = edges[offset:offset + 2 * chunk]
+                    for source, target in zip(block[::2], block[1::2]):
+                        new_ranks[target] += damping_factor * ranks[source] / out_degree[source]
+                    block.release()
+
+                change = sum(abs(new - old) for new, old in zip(new_ranks, ranks))
+                ranks = new_ranks
+                if change < tolerance:
+                    break
+        finally:
+            edges.release()
+            out_degree.release()
+            view.release()
+
+    return dict(zip(pages, ranks))
+
+
+def update_corpus(corpus, added=None, removed=None):
+    """
+    Return a copy of `corpus` with a link-graph delta applied.
+
+    `added` maps pages to sets of links to add to them; pages not yet in the
+    corpus are added. `removed` maps pages to sets of links to remove from
+    them; a value of None removes the page itself and every link to it.
+    """
+    corpus = {page: set(links) for page, links in corpus.items()}
+    for page, links in (removed or {}).items():
+        if links is None:
+            corpus.pop(page, None)
+        elif page in corpus:
+            corpus[page] -= links
+    for page, links in (added or {}).items():
+        corpus.setdefault(page, set()).update(links)
+
+    # Only include links to other pages in the corpus
+    for page in corpus:
+        corpus[page] = set(
+            link for link in corpus[page]
+            if link in corpus and link != page
+        )
+    return corpus
+
+
+def incremental_pagerank(corpus, damping_factor, ranks, added=None,
+                         removed=None, tolerance=TOLERANCE,
+                         max_iterations=MAX_ITERATIONS, compare=False):
+    """
+    Return updated PageRank values after applying a link-graph delta to
+    `corpus`, warm-starting iteration from the previous PageRank values
+    `ranks`.
+
+    `added` and `removed` describe the delta as in `update_corpus`. Pages
+    without a previous value start at 1/N before renormalizing. Return a
+    tuple (graph, ranks, saved) of the updated `LinkGraph`, its PageRank
+    values and, if `compare` is true, the number of sweeps saved over also
+    solving from a cold start (otherwise None).
+    """
+    graph = LinkGraph.from_corpus(update_corpus(corpus, added, removed))
+    if not graph:
+        return graph, {}, 0 if compare else None
+    pages = graph.pages
+    n = len(pages)
+
+    # Start from the previous ranks of pages that are still in the corpus
+    start = [ranks.get(page, 1 / n) for page in pages]
+    total = sum(start)
+    start = [rank / total for rank in start]
+    new_ranks, iterations = power_iterate(graph, damping_factor, start, tolerance, max_iterations)
 
+    saved = None
+    if compare:
+        _, cold = power_iterate(graph, damping_factor, [1 / n] * n, tolerance, max_iterations)
+        saved = cold - iterations
+    return graph, dict(zip(pages, new_ranks)), saved
 
 
 if __name__ == "__main__":
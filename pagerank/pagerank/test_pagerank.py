@@ -1,5 +1,26 @@
+import os
+import random
+import shutil
+
+import pytest
+
+from benchmark import generate_corpus
 from pagerank import *
 
+def test_link_graph():
+    corpus = crawl("corpus0")
+    assert isinstance(corpus, LinkGraph)
+    assert corpus == {
+        "1.html": {"2.html"},
+        "2.html": {"1.html", "3.html"},
+        "3.html": {"2.html", "4.html"},
+        "4.html": {"2.html"},
+    }
+    assert LinkGraph.from_corpus(dict(corpus)) == corpus
+    assert list(corpus.out_degree) == [len(corpus[page]) for page in corpus.pages]
+    offsets, sources = corpus.inbound()
+    assert set(corpus.pages[source] for source in sources[offsets[corpus.index["2.html"]]:offsets[corpus.index["2.html"] + 1]]) == {"1.html", "3.html", "4.html"}
+
 def test_transition_model():
     for corpus_num in [0,1,2]:
         corpus = crawl(f"corpus{corpus_num}")
@@ -38,7 +59,170 @@ def test_iterate_pagerank():
             total = 1
         assert round(total, 3) == 1
 
+def test_iterate_pagerank_does_not_mutate():
+    corpus = {"1.html": {"2.html"}, "2.html": {"1.html", "3.html"}, "3.html": set()}
+    page_rank = iterate_pagerank(corpus, .85)
+    assert corpus == {"1.html": {"2.html"}, "2.html": {"1.html", "3.html"}, "3.html": set()}
+    expected = iterate_pagerank({"1.html": {"2.html"}, "2.html": {"1.html", "3.html"},
+                                 "3.html": {"1.html", "2.html", "3.html"}}, .85)
+    for page in expected:
+        assert abs(page_rank[page] - expected[page]) < .0001
+
+def test_sparse_pagerank():
+    for corpus_num in [0,1,2]:
+        page_rank = sparse_pagerank(crawl(f"corpus{corpus_num}"), .85)
+        expected = iterate_pagerank(crawl(f"corpus{corpus_num}"), .85)
+        assert round(sum(page_rank.values()), 3) == 1
+        for page in expected:
+            assert abs(page_rank[page] - expected[page]) < .001
+
+def test_batch_sample_pagerank():
+    random.seed(0)
+    for corpus_num in [0,1,2]:
+        corpus = crawl(f"corpus{corpus_num}")
+        expected = sparse_pagerank(corpus, .85)
+        runs = [batch_sample_pagerank(corpus, .85, SAMPLES) for _ in range(30)]
+        for page_rank in runs:
+            assert round(sum(page_rank.values()), 3) == 1
+            for page in expected:
+                assert abs(page_rank[page] - expected[page]) < .03
+        # Averaged over many runs, the estimates are unbiased
+        for page in expected:
+            assert abs(sum(run[page] for run in runs) / len(runs) - expected[page]) < .004
+
+def test_solve_pagerank():
+    for corpus_num in [0,1,2]:
+        corpus = crawl(f"corpus{corpus_num}")
+        expected = sparse_pagerank(corpus, DAMPING)
+        for solver in SOLVERS:
+            page_rank, iterations = solve_pagerank(corpus, DAMPING, solver)
+            assert 0 < iterations < MAX_ITERATIONS
+            for page in expected:
+                assert abs(page_rank[page] - expected[page]) < .0001
+    with pytest.raises(ValueError):
+        solve_pagerank(corpus, DAMPING, "jacobi")
+
+def test_solve_pagerank_large(tmp_path):
+    corpus = generate_corpus(tmp_path, 1000, "power-law", rng=random.Random(0))
+    for damping in [.85, .99]:
+        expected = sparse_pagerank(corpus, damping, tolerance=1e-13, max_iterations=100000)
+        iterations = {}
+        for solver in SOLVERS:
+            page_rank, iterations[solver] = solve_pagerank(corpus, damping, solver)
+            assert abs(sum(page_rank.values()) - 1) < 1e-12
+            for page in expected:
+                assert abs(page_rank[page] - expected[page]) < 1e-9
+        assert iterations["gauss-seidel"] < iterations["power"]
+
+def test_personalized_pagerank():
+    corpus = crawl("corpus2")
+    ranks = personalized_pagerank(corpus, .85, {
+        "all": set(corpus),
+        "ai": {"ai.html", "inference.html"},
+        "c": {"c.html": 3, "python.html": 1},
+    })
+    expected = sparse_pagerank(corpus, .85)
+    for page in expected:
+        assert abs(ranks["all"][page] - expected[page]) < .0001
+    for topic in ranks:
+        assert round(sum(ranks[topic].values()), 3) == 1
+    assert ranks["ai"]["ai.html"] > expected["ai.html"]
+    assert ranks["c"]["c.html"] > ranks["ai"]["c.html"]
+
+def test_incremental_pagerank():
+    corpus = crawl("corpus1")
+    ranks = sparse_pagerank(corpus, .85)
+    added = {"bfs.html": {"minimax.html"}, "chess.html": {"games.html"}}
+    removed = {"search.html": {"dfs.html"}, "tictactoe.html": None}
+    new_corpus, new_ranks, saved = incremental_pagerank(corpus, .85, ranks, added, removed)
+    assert saved is None
+    assert "tictactoe.html" in corpus
+    assert new_corpus == update_corpus(corpus, added, removed)
+    assert "tictactoe.html" not in new_corpus
+    assert new_corpus["chess.html"] == {"games.html"}
+    expected = sparse_pagerank(new_corpus, .85)
+    for page in expected:
+        assert abs(new_ranks[page] - expected[page]) < .001
+
+def test_incremental_pagerank_saved(tmp_path):
+    corpus = generate_corpus(tmp_path, 500, "power-law", rng=random.Random(0))
+    ranks = sparse_pagerank(corpus, .85)
+    added = {"0.html": {"1.html"}}
+    _, new_ranks, saved = incremental_pagerank(corpus, .85, ranks, added, compare=True)
+    graph = LinkGraph.from_corpus(update_corpus(corpus, added))
+    _, cold = power_iterate(graph, .85, [1 / len(graph)] * len(graph))
+    _, warm = power_iterate(graph, .85, [ranks[page] for page in graph.pages])
+    assert saved == cold - warm > 0
+
+def test_stream_pagerank(tmp_path):
+    for corpus_num in [0,1,2]:
+        corpus = crawl(f"corpus{corpus_num}")
+        links = crawl_edge_file(f"corpus{corpus_num}", tmp_path / "edges", processes=corpus_num or 1)
+        assert links == len(corpus.targets)
+        page_rank = stream_pagerank(tmp_path / "edges", .85, chunk=3)
+        expected = sparse_pagerank(corpus, .85)
+        assert page_rank.keys() == expected.keys()
+        for page in expected:
+            assert abs(page_rank[page] - expected[page]) < .000001
+
+def test_generate_corpus(tmp_path):
+    for distribution in ["uniform", "power-law"]:
+        directory = tmp_path / distribution
+        directory.mkdir()
+        corpus = generate_corpus(directory, 50, distribution, degree=4, dangling=.2, rng=random.Random(0))
+        assert len(corpus) == 50
+        assert any(not links for links in corpus.values())
+        assert crawl(directory) == corpus
+
+def test_parallel_crawl(tmp_path):
+    for corpus_num in [0,1,2]:
+        directory = tmp_path / f"corpus{corpus_num}"
+        shutil.copytree(f"corpus{corpus_num}", directory)
+        corpus = crawl(directory)
+        assert parallel_crawl(directory, processes=2) == corpus
+        assert os.path.exists(directory / CACHE_FILENAME)
+        # Unchanged files are read back from the cache
+        assert parallel_crawl(directory) == corpus
+
+    # A changed file is parsed again, and a removed page is dropped from the links
+    os.remove(directory / "python.html")
+    with open(directory / "ai.html", "a") as f:
+        f.write('<a href="logic.html">Logic</a>')
+    assert parallel_crawl(directory) == crawl(directory)
+
+def test_truncated_link_cache(tmp_path):
+    directory = tmp_path / "corpus2"
+    shutil.copytree("corpus2", directory)
+    corpus = parallel_crawl(directory, processes=1)
+    with open(directory / CACHE_FILENAME, "rb") as f:
+        contents = f.read()
+    header = contents.index(b"\n") + 1
+
+    # A cache cut off anywhere is ignored, and rewritten by the next crawl
+    for length in [0, header // 2, header, header + 8, len(contents) - 4]:
+        with open(directory / CACHE_FILENAME, "wb") as f:
+            f.write(contents[:length])
+        assert load_link_cache(directory / CACHE_FILENAME) == {}
+        assert parallel_crawl(directory, processes=1) == corpus
+        assert load_link_cache(directory / CACHE_FILENAME) != {}
+    assert sorted(os.listdir(directory)) == sorted(os.listdir("corpus2") + [CACHE_FILENAME])
+
+def test_unwritable_link_cache(tmp_path):
+    directory = tmp_path / "corpus0"
+    shutil.copytree("corpus0", directory)
+    corpus = crawl(directory)
+    assert parallel_crawl(directory, cache=tmp_path / "missing" / CACHE_FILENAME) == corpus
+    assert parallel_crawl(directory, cache=False) == corpus
+    assert not os.path.exists(directory / CACHE_FILENAME)
+
 if __name__ == "__main__":
+    test_link_graph()
     test_transition_model()
     test_sample_pagerank()
     test_iterate_pagerank()
+    test_iterate_pagerank_does_not_mutate()
+    test_sparse_pagerank()
+    test_batch_sample_pagerank()
+    test_solve_pagerank()
+    test_personalized_pagerank()
+    test_incremental_pagerank()